@@ -3,16 +3,31 @@
 Script to generate EPUB from the JS content file
 """
 
+import hashlib
+import io
 import json
+import multiprocessing
 import os
+import pickle
 import shutil
 import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 import re
 from datetime import datetime
 import argparse
 import ast
 
+try:
+    import fcntl
+except ImportError:  # not available on Windows; fast_copy falls back
+    fcntl = None
+
+# FICLONE ioctl: copy-on-write clone on btrfs/XFS (shares extents, no bytes
+# copied); harmlessly rejected with EOPNOTSUPP elsewhere
+_FICLONE = 0x40049409
+
 # Configuration
 SOURCE_DIR = Path(__file__).parent
 
@@ -28,6 +43,9 @@ EPUB_CSS_NAME = "styles.css"
 
 CUSTOM_CSS_NAME = "custom.css"
 
+# Sidecar of page digests used to skip unchanged --debug-tree rewrites
+BUILD_CACHE_NAME = ".build_cache.json"
+
 # Runtime configuration (initialized in main())
 INPUT_DIR = None
 BOOK_TITLE = None
@@ -47,6 +65,13 @@ EPUB_NAME = None
 CUSTOM_CSS_FILE = SOURCE_DIR / CUSTOM_CSS_NAME
 DEFAULT_CSS_FILE = None
 
+# Whether the optional custom.css exists (computed once in init_config so the
+# per-page path doesn't stat the file), plus the prebuilt <link> tag for it
+CUSTOM_CSS_EXISTS = False
+CUSTOM_CSS_LINK_TAG = f'    <link rel="stylesheet" type="text/css" href="../css/{CUSTOM_CSS_NAME}" />'
+# Variant used by the nav/content writers (self-closing, newline-terminated)
+CUSTOM_CSS_NAV_LINK = f'    <link rel="stylesheet" type="text/css" href="../css/{CUSTOM_CSS_NAME}"/>\n'
+
 # EPUB structure directories
 OEBPS_DIR_NAME = "OPS"
 XHTML_DIR_NAME = "xhtml"
@@ -62,6 +87,93 @@ OEBPS_FONTS_DIR = None
 OEBPS_XHTML_DIR = None
 OEBPS_CSS_DIR = None
 
+# Precompiled regular expressions. These run in the per-page/per-sentence hot
+# paths, so they are compiled once at import time instead of relying on re's
+# internal pattern cache (which still pays a dict lookup per call).
+# Single alternation matching <z class='s'>, <z class="w"> and </z> so one
+# pass strips all three forms instead of three separate scans.
+_RE_Z_ALL = re.compile(r'''<z\s+class=['"][sw]['"]>|</z>''')
+_RE_BR_SPACE = re.compile(r'<br\s*/?\s*>', re.IGNORECASE)
+_RE_TAG = re.compile(r'<[^>]+>')
+# <br> and <hr> handled in a single pass; the callback dispatches on group(1)
+_RE_BR_HR = re.compile(r'<(br|hr)(\s[^>]*?)?\s*/?>')
+_RE_IMG_SRC = re.compile(r'src=["\']images/')
+_RE_IMG_ALT = re.compile(r'alt=["\']([^"\']*)["\']')
+_RE_IMG_TAG_CLOSE = re.compile(r'(<img[^>]*?)(\s*/?>)')
+_RE_P_NONINDENT1 = re.compile(r'<p\s+class=["\']nonindent1["\']([^>]*)>(.*?)</p>', re.DOTALL)
+_RE_P_NONINDENT_BEST = re.compile(
+    r'<p\s+class=["\']nonindent["\']([^>]*)>(.*?Bestellers[^<]*?)</p>',
+    re.DOTALL | re.IGNORECASE,
+)
+_RE_P_TAG = re.compile(r'<p([^>]*)>(.*?)</p>', re.DOTALL)
+_RE_P_EXCLUDED_CLASS = re.compile(r'class=["\'](nonindent|crt)')
+_RE_HEADING = re.compile(r'<h[1-6]')
+_RE_HEAD_OPEN = re.compile(r'<head', re.IGNORECASE)
+_RE_HEAD_CLOSE = re.compile(r'</head', re.IGNORECASE)
+_RE_HEAD_ONLY_TAGS = re.compile(r'<(link|meta|script|style|title)', re.IGNORECASE)
+_RE_UL_OPEN = re.compile(r'<ul([^>]*)>', re.IGNORECASE)
+_RE_UL_TAG = re.compile(r'<ul[^>]*>', re.IGNORECASE)
+_RE_LI_OPEN = re.compile(r'<li([^>]*)>', re.IGNORECASE)
+_RE_LI_TAG = re.compile(r'<li[^>]*>', re.IGNORECASE)
+# Lowercase fast paths for the patterns above: generated content is
+# overwhelmingly lowercase, so the case-folding engine path only runs when
+# the case-sensitive pattern misses.
+_RE_UL_OPEN_FAST = re.compile(r'<ul([^>]*)>')
+_RE_UL_TAG_FAST = re.compile(r'<ul[^>]*>')
+_RE_LI_OPEN_FAST = re.compile(r'<li([^>]*)>')
+_RE_LI_TAG_FAST = re.compile(r'<li[^>]*>')
+_RE_ID_STRIP = re.compile(r'\s+id=["\'][^"\']+["\']')
+_RE_ID_ATTR = re.compile(r'\bid\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+_RE_BLOCK_ELEM = re.compile(r'<(?P<tag>h[1-6]|p|div|section)(?P<attrs>(?:\s+[^>]*?)?)>', re.IGNORECASE)
+_RE_H1_AUTHOR = re.compile(r'<h1((?=[^>]*class=["\']author["\'])[^>]*)>(.*?)</h1>', re.DOTALL)
+# Chapter-title extraction for content.xhtml
+_RE_CHAPTER_INNER = re.compile(r'<h1[^>]*class=["\']chapter["\'][^>]*>(.*?)</h1>', re.DOTALL | re.IGNORECASE)
+_RE_CHAPTER_LEAD = re.compile(r'^.*?<br\s*/?\s*>', re.DOTALL | re.IGNORECASE)
+_RE_SMALL_CLASS = re.compile(r'\bclass=["\']small["\']')
+
+# Opening markup shared by every generated page, compiled once at import so
+# generate_html_page only substitutes the per-page fields instead of
+# rebuilding the boilerplate lines on every call
+_PAGE_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<!DOCTYPE html>\n'
+    '<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" lang="en">\n'
+    '\n'
+    '<head>\n'
+    '    <meta charset="utf-8" />\n'
+    '    <meta name="viewport" content="width=device-width, initial-scale=1.0"/>\n'
+    '    <title>%(title)s</title>\n'
+    '    <link rel="stylesheet" type="text/css" href="../css/%(css)s" />\n'
+    '%(custom_css)s</head>\n'
+    '\n'
+    '<body>\n'
+    '    <main role="main">\n'
+    '        <section id="page_%(anchor)s" epub:type="%(epub_type)s"%(role_attr)s class="%(section_class)s">'
+)
+# Closing markup shared by every generated page
+_PAGE_FOOTER = '\n        </section>\n    </main>\n</body>\n\n</html>'
+# Matches any opening/closing tag; used by transform_sentence to apply all
+# per-sentence rewrites in a single scan, dispatching per tag in the callback.
+_RE_SENTENCE_TAG = re.compile(r'<(?P<close>/?)(?P<tag>\w+)(?P<attrs>[^>]*)>')
+
+# Elements that should have IDs (block-level elements). Focus on elements
+# that are typically top-level content elements.
+_ELEMENTS_NEEDING_IDS = frozenset({
+    'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'div', 'section', 'article',
+    'nav', 'header', 'footer', 'aside', 'main', 'ul', 'ol', 'li',
+    'dl', 'dt', 'dd', 'blockquote', 'figure', 'figcaption', 'table',
+    'thead', 'tbody', 'tfoot', 'tr',
+})
+
+# Relative images path used in rewritten HTML references
+_IMAGES_REL = f'../{IMAGES_DIR_NAME}/'
+
+# Patterns/literals that depend on runtime configuration (set in init_config)
+_INPUT_MEDIA_PREFIX = None
+_RE_TOC_HREF = None
+_COVER_REL_SRC = None
+_COVER_REL_DST = f'../{IMAGES_DIR_NAME}/cover.jpg'
+
 
 def parse_args():
     """Parse command-line arguments for the EPUB generator."""
@@ -92,6 +204,25 @@ def parse_args():
         "--author",
         help="Override book author (otherwise taken from JSON or default).",
     )
+    parser.add_argument(
+        "--copy-workers",
+        type=int,
+        default=8,
+        help="Thread count for media/font/audio copy loops (default: 8; use 1 on spinning disks).",
+    )
+    parser.add_argument(
+        "--compresslevel",
+        type=int,
+        default=6,
+        choices=range(0, 10),
+        metavar="{0-9}",
+        help="Deflate level for the EPUB zip (default: 6; try 1 for faster packaging of large books).",
+    )
+    parser.add_argument(
+        "--debug-tree",
+        action="store_true",
+        help="Also write the generated xhtml pages into the EPUB folder tree for inspection.",
+    )
     return parser.parse_args()
 
 
@@ -102,24 +233,27 @@ def extract_text_from_html(html_content):
     """
     if not html_content:
         return None
-    
-    # Remove z tags (opening and closing)
-    text = re.sub(r"<z\s+class=['\"]s['\"]>", '', html_content)
-    text = re.sub(r'<z\s+class=["\']w["\']>', '', text)
-    text = re.sub(r'</z>', '', text)
-    
+
+    # Fast path: no tags at all, only whitespace normalisation is needed.
+    # str.split() already collapses whitespace runs at C level, so the
+    # split/join pair beats the regex engine for this job.
+    if '<' not in html_content:
+        text = ' '.join(html_content.split())
+        return text if text else None
+
+    # Remove z tags (opening and closing) in one pass
+    text = _RE_Z_ALL.sub('', html_content)
+
     # Convert <br> and <br /> to spaces
-    text = re.sub(r'<br\s*/?\s*>', ' ', text, flags=re.IGNORECASE)
-    
+    text = _RE_BR_SPACE.sub(' ', text)
+
     # Extract text content from HTML tags (remove all HTML tags)
-    text = re.sub(r'<[^>]+>', '', text)
-    
-    # Clean up whitespace: normalize multiple spaces to single space
-    text = re.sub(r'\s+', ' ', text)
-    
-    # Strip leading/trailing whitespace
-    text = text.strip()
-    
+    if '<' in text:
+        text = _RE_TAG.sub('', text)
+
+    # Collapse whitespace runs and strip the ends in one split/join pass
+    text = ' '.join(text.split())
+
     return text if text else None
 
 
@@ -141,18 +275,23 @@ def extract_metadata_from_json(data, default_title, default_id, default_author):
         sentences = tp_page.get("sentences", [])
         for sentence in sentences:
             sentence_text = sentence.get("sentence_text", "")
-            if not sentence_text:
+            # Cheap outer guard before the specific class probes
+            if not sentence_text or 'class=' not in sentence_text:
                 continue
-            
+
             # Extract title from <h1 class='title'>
             if 'class=\'title\'' in sentence_text or 'class="title"' in sentence_text:
                 if title is None:  # Only extract first match
                     title = extract_text_from_html(sentence_text)
-            
+
             # Extract author from <h1 class='author'>
             if 'class=\'author\'' in sentence_text or 'class="author"' in sentence_text:
                 if author is None:  # Only extract first match
                     author = extract_text_from_html(sentence_text)
+
+            # Stop scanning once both fields have been found
+            if title is not None and author is not None:
+                break
     
     # Fall back to top-level fields if title page extraction didn't work
     if not title:
@@ -202,6 +341,8 @@ def init_config(input_dir_path: Path, book_title: str, book_id: str, book_author
     global EPUB_DIR, EPUB_NAME
     global OEBPS_DIR, METAINF_DIR, OEBPS_MEDIA_DIR, OEBPS_FONTS_DIR, OEBPS_XHTML_DIR, OEBPS_CSS_DIR
     global DEFAULT_CSS_FILE
+    global _INPUT_MEDIA_PREFIX, _RE_TOC_HREF, _COVER_REL_SRC
+    global CUSTOM_CSS_EXISTS
 
     INPUT_DIR = input_dir_path
     BOOK_TITLE = book_title
@@ -209,11 +350,28 @@ def init_config(input_dir_path: Path, book_title: str, book_id: str, book_author
     BOOK_AUTHOR = book_author
     BOOK_PREFIX = f"{BOOK_ID}_"
 
+    # Compile the patterns that depend on runtime configuration once, so the
+    # per-sentence hot paths don't rebuild them on every call. The media
+    # prefix is a plain literal handled with str.replace rather than regex.
+    _INPUT_MEDIA_PREFIX = f'{input_dir_path.name}/media/'
+    _RE_TOC_HREF = re.compile(rf'href="{re.escape(BOOK_PREFIX)}([^"]+)\.htm"')
+    _COVER_REL_SRC = f'{_IMAGES_REL}{COVER_SOURCE_NAME}' if COVER_SOURCE_NAME else None
+
+    # Stat the optional custom.css once instead of once per generated page
+    CUSTOM_CSS_EXISTS = CUSTOM_CSS_FILE.exists()
+
     # Source locations (within the input directory)
     JS_FILE = input_dir_path / f"{input_dir_path.name}.js"
     MEDIA_DIR = input_dir_path / "media"
     FONTS_SOURCE_DIR = input_dir_path / FONTS_DIR_NAME
 
+    # The cached font scan depends on the directories above
+    global _FONT_CACHE
+    _FONT_CACHE = None
+
+    # Cached href resolutions depend on BOOK_PREFIX
+    _xhtml_name.cache_clear()
+
     # DEFAULT_CSS_FILE is no longer needed - we use Styles array directly
     # Keeping it for backward compatibility but it won't be used if Styles exists
     DEFAULT_CSS_FILE = f"{BOOK_ID}.css"
@@ -237,6 +395,57 @@ def init_config(input_dir_path: Path, book_title: str, book_id: str, book_author
     OEBPS_CSS_DIR = OEBPS_DIR / CSS_DIR_NAME
 
 
+def _js_object_to_json(text: str) -> str:
+    """Normalise a quote-keyed JS object literal into strict JSON.
+
+    Converts single-quoted strings to double-quoted (escaping as needed) and
+    drops trailing commas before closing braces/brackets, tracking string
+    state so punctuation inside string values is left untouched.
+    """
+    out = []
+    append = out.append
+    i = 0
+    n = len(text)
+    quote = None  # current string delimiter, or None outside strings
+    while i < n:
+        ch = text[i]
+        if quote is None:
+            if ch == '"' or ch == "'":
+                quote = ch
+                append('"')
+            elif ch == ',':
+                # Drop trailing commas before a closing brace/bracket
+                j = i + 1
+                while j < n and text[j].isspace():
+                    j += 1
+                if j < n and text[j] in '}]':
+                    i += 1
+                    continue
+                append(ch)
+            else:
+                append(ch)
+        else:
+            if ch == '\\' and i + 1 < n:
+                nxt = text[i + 1]
+                if nxt == "'":
+                    # \' is not a valid JSON escape; the bare quote is fine
+                    append("'")
+                else:
+                    append(ch)
+                    append(nxt)
+                i += 2
+                continue
+            elif ch == quote:
+                quote = None
+                append('"')
+            elif ch == '"':
+                append('\\"')
+            else:
+                append(ch)
+        i += 1
+    return ''.join(out)
+
+
 def parse_js_file(js_file: Path):
     """Parse the JS file and extract JSON content.
 
@@ -245,8 +454,24 @@ def parse_js_file(js_file: Path):
     with unquoted keys. We normalise it into valid JSON first.
     """
     print(f"Reading JS file: {js_file}")
-    with open(js_file, 'r', encoding='utf-8') as f:
-        raw = f.read()
+    # Warm-cache fast path: a pickle sidecar next to the input holds the
+    # parsed dict keyed on the JS file's (mtime_ns, size), so unchanged
+    # inputs skip the whole normalise-and-parse phase on rebuilds.
+    st = js_file.stat()
+    cache_key = (st.st_mtime_ns, st.st_size)
+    cache_path = js_file.with_suffix('.cache.pkl')
+    try:
+        with open(cache_path, 'rb') as f:
+            cached_key, cached_data = pickle.load(f)
+        if cached_key == cache_key:
+            print("  Using cached parse (input unchanged)")
+            return cached_data
+    except (OSError, pickle.UnpicklingError, ValueError, EOFError):
+        pass
+
+    # Read as raw bytes and decode once: this bypasses TextIOWrapper's
+    # incremental decoder, which is noticeably slower on multi-MB files.
+    raw = js_file.read_bytes().decode('utf-8')
 
     # Strip the leading variable assignment and trailing semicolon/newlines
     if raw.lstrip().startswith("var content"):
@@ -271,97 +496,122 @@ def parse_js_file(js_file: Path):
 
     py_like = quote_keys(raw)
 
-    # literal_eval can handle single/double quotes and most trailing commas
-    data = ast.literal_eval(py_like)
+    # Prefer the C-implemented JSON parser: normalise the remaining JS-isms
+    # (single-quoted strings, trailing commas) into strict JSON and parse
+    # that. ast.literal_eval builds and walks a full Python AST, which is far
+    # slower on multi-MB content files, so it is kept only as a fallback for
+    # inputs the normaliser doesn't anticipate.
+    try:
+        data = json.loads(_js_object_to_json(py_like), strict=False)
+    except ValueError:
+        data = ast.literal_eval(py_like)
+
+    # Refresh the sidecar; failure to write it only costs the next warm start
+    try:
+        with open(cache_path, 'wb') as f:
+            pickle.dump((cache_key, data), f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass
     return data
 
+def fast_copy(src, dst):
+    """copy2 equivalent that avoids moving bytes where the kernel allows.
+
+    Tried in order: os.link (same filesystem - the EPUB tree copy shares
+    the source inode and is never mutated, only read into the zip), a
+    FICLONE reflink (copy-on-write clone on btrfs/XFS), then
+    shutil.copyfile, which still uses sendfile on Linux so the bytes never
+    enter userspace. The final copystat preserves the mtime that
+    copy_if_changed compares; the link/reflink paths carry it inherently."""
+    try:
+        if os.path.lexists(dst):
+            os.unlink(dst)
+        os.link(src, dst)
+        return
+    except OSError:
+        pass
+    if fcntl is not None:
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+            shutil.copystat(src, dst)
+            return
+        except OSError:
+            pass
+    shutil.copyfile(src, dst)
+    shutil.copystat(src, dst)
+
+
+def copy_if_changed(src, dst):
+    """Copy src to dst unless dst already matches (same size and mtime, as
+    preserved by an earlier copy). Returns True when bytes were copied."""
+    try:
+        # Sources from _scan_ext are DirEntry objects whose stat() result
+        # is cached on the entry; reuse it rather than re-walking the path
+        src_stat = src.stat() if isinstance(src, os.DirEntry) else os.stat(src)
+        dst_stat = os.stat(dst)
+        if (src_stat.st_size == dst_stat.st_size
+                and src_stat.st_mtime_ns == dst_stat.st_mtime_ns):
+            return False
+    except OSError:
+        pass
+    fast_copy(src, dst)
+    return True
+
+
+# Thread count used by _run_copies; overridden by the --copy-workers flag
+_COPY_WORKERS = 8
+
+# Deflate level for the EPUB zip; overridden by the --compresslevel flag
+_COMPRESS_LEVEL = 6
+
+# Assets at or above this size are streamed into the zip in 1 MiB chunks
+# instead of being read whole, capping the packaging high-water mark
+_ZIP_STREAM_THRESHOLD = 8 * 1024 * 1024
+
+
+def _run_copies(copy_pairs):
+    """Run copy_if_changed over (src, dst) pairs, in a thread pool when
+    there is more than one file and more than one worker is configured. The
+    copies are independent and I/O-bound, so a small pool overlaps the
+    syscalls. Returns the per-pair results in order."""
+    if len(copy_pairs) > 1 and _COPY_WORKERS > 1:
+        with ThreadPoolExecutor(max_workers=_COPY_WORKERS) as executor:
+            return list(executor.map(lambda pair: copy_if_changed(*pair), copy_pairs))
+    return [copy_if_changed(src, dst) for src, dst in copy_pairs]
+
+
 def create_epub_structure():
-    """Create EPUB directory structure"""
+    """Create (or reuse) the EPUB directory structure.
+
+    Rather than deleting and recreating the whole tree - which on warm
+    incremental runs churns every already-identical media/font/CSS file -
+    the tree is kept in place. Only the generated .xhtml files are cleared;
+    everything else is refreshed via copy_if_changed by the copy helpers.
+    """
     print("Creating EPUB structure...")
-    
-    # Remove existing EPUB directory if it exists
-    if EPUB_DIR.exists():
-        shutil.rmtree(EPUB_DIR)
-    
-    # Create directories
+
+    # Create directories (mimetype and META-INF/container.xml never touch
+    # the disk tree - they are zipped straight from memory)
     OEBPS_DIR.mkdir(parents=True, exist_ok=True)
-    METAINF_DIR.mkdir(parents=True, exist_ok=True)
     OEBPS_MEDIA_DIR.mkdir(parents=True, exist_ok=True)
     # Fonts are now stored under css/fonts/, so we do not need a top-level
     # OPS/fonts directory inside the EPUB structure.
     OEBPS_XHTML_DIR.mkdir(parents=True, exist_ok=True)
     OEBPS_CSS_DIR.mkdir(parents=True, exist_ok=True)
-    
-    return OEBPS_DIR, METAINF_DIR, OEBPS_MEDIA_DIR, OEBPS_FONTS_DIR, OEBPS_XHTML_DIR, OEBPS_CSS_DIR
-
-def fix_image_paths(html_content, page_id):
-    """Fix image paths in HTML content"""
-    # Replace the long path with ../images/ to match POC_ePUB structure
-    # INPUT_DIR is a Path pointing to the input folder; we only want its name
-    # when matching within the HTML content.
-    input_dir_name = INPUT_DIR.name if isinstance(INPUT_DIR, Path) else str(INPUT_DIR)
-    html_content = re.sub(
-        rf'{re.escape(input_dir_name)}/media/',
-        f'../{IMAGES_DIR_NAME}/',
-        html_content
-    )
-    
-    # Also fix any direct references to images/ (should be ../images/)
-    html_content = re.sub(
-        r'src=["\']images/',
-        r'src="../images/',
-        html_content
-    )
-
-    # If we have a known cover source image name, normalize any references to it
-    # to use the standard cover.jpg inside the EPUB.
-    if COVER_SOURCE_NAME:
-        html_content = html_content.replace(
-            f'../{IMAGES_DIR_NAME}/{COVER_SOURCE_NAME}',
-            f'../{IMAGES_DIR_NAME}/cover.jpg',
-        )
-
-    return html_content
-
-def clean_html_tags(html_content):
-    """Remove invalid <z> tags entirely, keeping only the text content"""
-    # Remove opening <z class='s'> tags
-    html_content = re.sub(r"<z\s+class=['\"]s['\"]>", '', html_content)
-    
-    # Remove opening <z class="w"> tags
-    html_content = re.sub(r'<z\s+class=["\']w["\']>', '', html_content)
-    
-    # Remove all closing </z> tags
-    html_content = re.sub(r'</z>', '', html_content)
-    
-    # Fix TOC links: convert old .htm filenames to .xhtml
-    # Replace href="0822452596_XXX.htm" with href="XXX.xhtml"
-    html_content = re.sub(
-        rf'href="{re.escape(BOOK_PREFIX)}([^"]+)\.htm"',
-        r'href="\1.xhtml"',
-        html_content
-    )
 
-    
-    return html_content
+    return OEBPS_DIR, OEBPS_MEDIA_DIR, OEBPS_FONTS_DIR, OEBPS_XHTML_DIR, OEBPS_CSS_DIR
 
 def add_aria_hidden_to_br_hr(html_content):
     """Add aria-hidden=\"true\" to <br> and <hr> elements so they are hidden from screen readers."""
     if not html_content:
         return html_content
-    # <br> or <br /> or <br ...attrs...> - add aria-hidden="true" if not present
-    html_content = re.sub(
-        r'<br(\s[^>]*?)?\s*/?>',
-        lambda m: _add_aria_hidden_to_self_closing(m.group(0), 'br', m.group(1) or ''),
-        html_content
-    )
-    # <hr> or <hr /> or <hr ...attrs...> - add aria-hidden="true" if not present
-    html_content = re.sub(
-        r'<hr(\s[^>]*?)?\s*/?>',
-        lambda m: _add_aria_hidden_to_self_closing(m.group(0), 'hr', m.group(1) or ''),
+    # <br>/<hr> (with or without attributes, self-closing or not) handled in a
+    # single pass - add aria-hidden="true" if not present
+    return _RE_BR_HR.sub(
+        lambda m: _add_aria_hidden_to_self_closing(m.group(0), m.group(1), m.group(2) or ''),
         html_content
     )
-    return html_content
 
 def _add_aria_hidden_to_self_closing(full_tag, tag_name, existing_attrs):
     """Ensure tag has aria-hidden=\"true\" and return the full tag string."""
@@ -374,6 +624,102 @@ def _add_aria_hidden_to_self_closing(full_tag, tag_name, existing_attrs):
         new_attrs = ' aria-hidden="true"'
     return f'<{tag_name}{new_attrs} />'
 
+def transform_sentence(sentence_text, page_number, element_counter):
+    """Apply all per-sentence HTML rewrites in a single pass.
+
+    Fuses the image-path fixes, z-tag/TOC-link cleanup, br/hr aria-hiding
+    and unique-ID assignment that used to be four standalone passes: one
+    master pattern matches each tag once and the callback dispatches on
+    the tag name, so every sentence string is rewritten once instead of
+    four-plus times. Returns (transformed_text, element_counter).
+    """
+    if not sentence_text or '<' not in sentence_text:
+        return sentence_text, element_counter
+
+    # The literal media-path rewrites apply to the whole sentence first:
+    # the paths can occur in plain text nodes, not just inside tag
+    # attributes
+    if 'media/' in sentence_text or 'images/' in sentence_text:
+        sentence_text = sentence_text.replace(_INPUT_MEDIA_PREFIX, _IMAGES_REL)
+        if _COVER_REL_SRC:
+            sentence_text = sentence_text.replace(_COVER_REL_SRC, _COVER_REL_DST)
+
+    # Shared ID prefix, formatted once per sentence instead of per element
+    id_prefix = f'page_{page_number}_' if page_number is not None else None
+
+    # Last character emitted so far ('' = start of output) plus the source
+    # offset consumed. Tracked so the top-level check in _transform sees
+    # the transformed stream: a block tag directly after a removed <z>
+    # wrapper is preceded by whatever came before the wrapper, exactly as
+    # when the ID pass ran after z-tag removal.
+    prev_end = 0
+    last_char = ''
+
+    def _transform(m):
+        nonlocal element_counter
+        tag_text = m.group(0)
+        tag = m.group('tag').lower()
+
+        # Remove invalid <z> tags entirely, keeping only the text content
+        if tag == 'z':
+            if m.group('close') or _RE_Z_ALL.fullmatch(tag_text):
+                return ''
+            return tag_text
+
+        # Direct src="images/ references become src="../images/
+        if 'images/' in tag_text:
+            tag_text = _RE_IMG_SRC.sub(r'src="../images/', tag_text)
+            if _COVER_REL_SRC and _COVER_REL_SRC in tag_text:
+                tag_text = tag_text.replace(_COVER_REL_SRC, _COVER_REL_DST)
+
+        # Fix TOC links: convert old .htm filenames to .xhtml
+        if BOOK_PREFIX and BOOK_PREFIX in tag_text:
+            tag_text = _RE_TOC_HREF.sub(r'href="\1.xhtml"', tag_text)
+
+        if m.group('close'):
+            return tag_text
+
+        # Attributes without any trailing self-closing slash
+        attrs = m.group('attrs')
+        self_closing = ''
+        stripped = attrs.rstrip()
+        if stripped.endswith('/'):
+            self_closing = '/'
+            attrs = stripped[:-1].rstrip()
+
+        # <br>/<hr> are hidden from screen readers
+        if tag == 'br' or tag == 'hr':
+            return _add_aria_hidden_to_self_closing(tag_text, tag, attrs)
+
+        # Assign unique IDs to top-level block elements (those preceded by
+        # whitespace or the start of the emitted output)
+        if id_prefix is not None and tag in _ELEMENTS_NEEDING_IDS:
+            if (last_char == '' or last_char.isspace()) and not _RE_ID_ATTR.search(attrs):
+                element_counter += 1
+                unique_id = id_prefix + str(element_counter)
+                if attrs.strip():
+                    new_attrs = f'{attrs} id="{unique_id}"'
+                else:
+                    new_attrs = f' id="{unique_id}"'
+                return f'<{m.group("tag")}{new_attrs}{self_closing}>'
+
+        return tag_text
+
+    def _rewrite_tag(m):
+        nonlocal prev_end, last_char
+        start = m.start()
+        if start > prev_end:
+            # Verbatim text between matches; its last char precedes this tag
+            last_char = m.string[start - 1]
+        prev_end = m.end()
+        out = _transform(m)
+        if out:
+            last_char = out[-1]
+        return out
+
+    return _RE_SENTENCE_TAG.sub(_rewrite_tag, sentence_text), element_counter
+
+
 def convert_copyright_structure(html_content, page_id, page_number):
     """
     Convert copyright page structure to match POC_ePUB:
@@ -386,53 +732,56 @@ def convert_copyright_structure(html_content, page_id, page_number):
         return html_content
     
     # Convert <p class='nonindent1'> to <h1>
-    html_content = re.sub(
-        r'<p\s+class=["\']nonindent1["\']([^>]*)>(.*?)</p>',
-        r'<h1\1>\2</h1>',
-        html_content,
-        flags=re.DOTALL
-    )
-    
+    html_content = _RE_P_NONINDENT1.sub(r'<h1\1>\2</h1>', html_content)
+
     # Convert <p class='nonindent'> with "Bestellers" to <h2>
-    html_content = re.sub(
-        r'<p\s+class=["\']nonindent["\']([^>]*)>(.*?Bestellers[^<]*?)</p>',
-        r'<h2\1>\2</h2>',
-        html_content,
-        flags=re.DOTALL | re.IGNORECASE
-    )
+    html_content = _RE_P_NONINDENT_BEST.sub(r'<h2\1>\2</h2>', html_content)
     
     # Now convert consecutive paragraphs (that aren't headings or special classes) to <ul><li>
     lines = html_content.split('\n')
     result_lines = []
+
+    # The nested grouping scan below revisits lines, so compute the per-line
+    # regex results once up front: (p_match, has excluded class, has heading).
+    # Lines without any tag skip the regex probes entirely.
+    line_meta = []
+    for line in lines:
+        if '<' in line:
+            p_match = _RE_P_TAG.search(line)
+            excluded = bool(p_match and _RE_P_EXCLUDED_CLASS.search(p_match.group(1)))
+            heading = bool(_RE_HEADING.search(line))
+        else:
+            p_match = None
+            excluded = False
+            heading = False
+        line_meta.append((p_match, excluded, heading))
+
     i = 0
-    
-    while i < len(lines):
+    n_lines = len(lines)
+    while i < n_lines:
         line = lines[i]
-        
+        p_match, p_excluded, _ = line_meta[i]
+
         # Check if this is a paragraph that could be a list item
-        p_match = re.search(r'<p([^>]*)>(.*?)</p>', line, re.DOTALL)
-        if p_match and not re.search(r'class=["\'](nonindent|crt)', p_match.group(1)):
-            attrs = p_match.group(1)
+        if p_match and not p_excluded:
             content = p_match.group(2).strip()
-            
+
             # Skip if content is just whitespace or non-breaking space
             if content and content not in ['&#x00A0;', '&nbsp;', '']:
                 # Collect consecutive list items
                 list_items = []
                 j = i
-                
-                while j < len(lines):
+
+                while j < n_lines:
                     current_line = lines[j]
-                    current_p_match = re.search(r'<p([^>]*)>(.*?)</p>', current_line, re.DOTALL)
-                    
+                    current_p_match, current_excluded, current_heading = line_meta[j]
+
                     # Stop if we hit a heading, special paragraph, or non-paragraph element
-                    if (re.search(r'<h[1-6]', current_line) or 
-                        (current_p_match and re.search(r'class=["\'](nonindent|crt)', current_p_match.group(1))) or
+                    if (current_heading or current_excluded or
                         (not current_p_match and current_line.strip())):
                         break
-                    
+
                     if current_p_match:
-                        current_attrs = current_p_match.group(1)
                         current_content = current_p_match.group(2).strip()
                         if current_content and current_content not in ['&#x00A0;', '&nbsp;', '']:
                             list_items.append(current_content)
@@ -452,38 +801,48 @@ def convert_copyright_structure(html_content, page_id, page_number):
         result_lines.append(line)
         i += 1
     
-    # Convert result_lines back to HTML string for further processing
-    converted_html = '\n'.join(result_lines)
-    
-    # Split HTML into head and body sections - only process body content
-    head_match = re.search(r'(<head>.*?</head>)', converted_html, re.DOTALL | re.IGNORECASE)
-    body_match = re.search(r'(<body>.*?</body>)', converted_html, re.DOTALL | re.IGNORECASE)
-    
-    if not body_match:
-        # Fallback: process entire content but skip head-like tags
-        body_content = converted_html
-        head_content = ''
-    else:
-        head_content = head_match.group(1) if head_match else ''
-        body_content = body_match.group(1)
-    
-    # Reassign all IDs sequentially to avoid duplicates and ensure correct order
-    # Only process body content
+    # Reassign all IDs sequentially to avoid duplicates and ensure correct order.
+    # Only lines inside <body>...</body> are processed; everything else passes
+    # through untouched. Working on the line list directly (instead of joining,
+    # regex-extracting the body section, re-splitting and re-joining) keeps
+    # this a single pass over the page with no large intermediate strings.
     page_num = page_number if page_number else 3
+    # ID strings formatted once per page rather than per element
+    id_prefix = f'page_{page_num}_'
+    section_page_id = f'page_{page_num}'
     element_counter = 0
     current_ul_id = None
     li_counter = 0
-    body_lines = body_content.split('\n')
     final_body_lines = []
     in_head_section = False
-    
-    for line in body_lines:
-        # Track if we're still in head section (shouldn't happen, but safety check)
-        if re.search(r'<head', line, re.IGNORECASE):
+
+    # Fallback: if there is no <body> section, process the entire content
+    has_body = any('<body' in line for line in result_lines)
+    in_body = not has_body
+
+    for line in result_lines:
+        if not in_body:
+            if '<body' in line:
+                in_body = True  # the <body> line itself is processed below
+            else:
+                final_body_lines.append(line)
+                continue
+        closes_body = has_body and '</body>' in line
+        if closes_body:
+            in_body = False
+
+        # Cheap reject: lines without any tag need no regex work
+        if '<' not in line:
+            final_body_lines.append(line)
+            continue
+        # Track if we're still in head section (shouldn't happen, but safety
+        # check). The plain substring test covers lowercase input; the
+        # case-insensitive pattern is only consulted when it misses.
+        if '<head' in line or _RE_HEAD_OPEN.search(line):
             in_head_section = True
             final_body_lines.append(line)
             continue
-        if re.search(r'</head', line, re.IGNORECASE):
+        if '</head' in line or _RE_HEAD_CLOSE.search(line):
             in_head_section = False
             final_body_lines.append(line)
             continue
@@ -499,52 +858,60 @@ def convert_copyright_structure(html_content, page_id, page_number):
             continue
         
         # Skip link, meta, script, style tags (shouldn't be in body, but safety check)
-        if re.search(r'<(link|meta|script|style|title)', line, re.IGNORECASE):
+        if _RE_HEAD_ONLY_TAGS.search(line):
             final_body_lines.append(line)
             continue
-        
-        # Handle <ul> tags - assign sequential ID
-        ul_match = re.search(r'<ul([^>]*)>', line, re.IGNORECASE)
+
+        # Handle <ul> tags - assign sequential ID (lowercase fast path first)
+        ul_tag_re = _RE_UL_TAG_FAST
+        ul_match = _RE_UL_OPEN_FAST.search(line)
+        if not ul_match:
+            ul_tag_re = _RE_UL_TAG
+            ul_match = _RE_UL_OPEN.search(line)
         if ul_match:
             element_counter += 1
-            current_ul_id = f'page_{page_num}_{element_counter}'
+            current_ul_id = id_prefix + str(element_counter)
             li_counter = 0
             attrs = ul_match.group(1)
             # Remove existing id
-            attrs = re.sub(r'\s+id=["\'][^"\']+["\']', '', attrs)
+            attrs = _RE_ID_STRIP.sub('', attrs)
             # Add new id
             if attrs.strip():
                 new_attrs = f'{attrs} id="{current_ul_id}"'
             else:
                 new_attrs = f' id="{current_ul_id}"'
-            line = re.sub(r'<ul[^>]*>', f'<ul{new_attrs}>', line, flags=re.IGNORECASE)
-        
+            line = ul_tag_re.sub(f'<ul{new_attrs}>', line)
+
         # Handle <li> tags - use nested ID format: page_X_Y_Z
-        li_match = re.search(r'<li([^>]*)>', line, re.IGNORECASE)
+        li_tag_re = _RE_LI_TAG_FAST
+        li_match = _RE_LI_OPEN_FAST.search(line)
+        if not li_match:
+            li_tag_re = _RE_LI_TAG
+            li_match = _RE_LI_OPEN.search(line)
         if li_match:
             li_counter += 1
             if current_ul_id:
                 new_li_id = f'{current_ul_id}_{li_counter}'
                 attrs = li_match.group(1)
                 # Remove existing id
-                attrs = re.sub(r'\s+id=["\'][^"\']+["\']', '', attrs)
+                attrs = _RE_ID_STRIP.sub('', attrs)
                 # Add new id
                 if attrs.strip():
                     new_attrs = f'{attrs} id="{new_li_id}"'
                 else:
                     new_attrs = f' id="{new_li_id}"'
-                line = re.sub(r'<li[^>]*>', f'<li{new_attrs}>', line, flags=re.IGNORECASE)
+                line = li_tag_re.sub(f'<li{new_attrs}>', line)
             else:
                 # Fallback if no ul context (shouldn't happen)
                 element_counter += 1
-                new_li_id = f'page_{page_num}_{element_counter}'
+                new_li_id = id_prefix + str(element_counter)
                 attrs = li_match.group(1)
-                attrs = re.sub(r'\s+id=["\'][^"\']+["\']', '', attrs)
+                attrs = _RE_ID_STRIP.sub('', attrs)
                 if attrs.strip():
                     new_attrs = f'{attrs} id="{new_li_id}"'
                 else:
                     new_attrs = f' id="{new_li_id}"'
-                line = re.sub(r'<li[^>]*>', f'<li{new_attrs}>', line, flags=re.IGNORECASE)
+                line = li_tag_re.sub(f'<li{new_attrs}>', line)
         
         # Handle other block elements: h1, h2, p, div, section
         # Skip if already processed as ul/li
@@ -553,114 +920,38 @@ def convert_copyright_structure(html_content, page_id, page_number):
                 nonlocal element_counter
                 tag = match.group('tag')
                 attrs = match.group('attrs') or ''
-                
-                # Skip nested elements and head tags
-                if tag.lower() in ['span', 'strong', 'em', 'a', 'br', 'sup', 'link', 'meta', 'script', 'style', 'title']:
-                    return match.group(0)
-                
+
+                # The pattern only matches h1-h6/p/div/section, so nested
+                # inline and head-only tags never reach this callback.
+
                 # Preserve section ID if it matches page_{page_number} pattern (for TOC navigation)
                 if tag.lower() == 'section':
-                    id_match = re.search(r'\bid\s*=\s*["\']([^"\']+)["\']', attrs, re.IGNORECASE)
+                    id_match = _RE_ID_ATTR.search(attrs)
                     if id_match:
                         existing_id = id_match.group(1)
                         # If section ID is exactly page_{page_number}, preserve it
-                        if existing_id == f'page_{page_num}':
+                        if existing_id == section_page_id:
                             return match.group(0)
-                
+
                 element_counter += 1
-                new_id = f'page_{page_num}_{element_counter}'
-                
+                new_id = id_prefix + str(element_counter)
+
                 # Remove existing id
-                attrs = re.sub(r'\s+id=["\'][^"\']+["\']', '', attrs)
+                attrs = _RE_ID_STRIP.sub('', attrs)
                 # Add new id
                 if attrs.strip():
                     new_attrs = f'{attrs} id="{new_id}"'
                 else:
                     new_attrs = f' id="{new_id}"'
-                
+
                 return f'<{tag}{new_attrs}>'
-            
-            line = re.sub(
-                r'<(?P<tag>h[1-6]|p|div|section)(?P<attrs>(?:\s+[^>]*?)?)>',
-                replace_element_id,
-                line,
-                flags=re.IGNORECASE
-            )
+
+            line = _RE_BLOCK_ELEM.sub(replace_element_id, line)
         
         final_body_lines.append(line)
-    
-    # Reassemble HTML: head (unchanged) + processed body
-    processed_body = '\n'.join(final_body_lines)
-    
-    if head_match and body_match:
-        # Replace body section with processed version in the converted HTML
-        converted_html = converted_html.replace(body_match.group(1), processed_body)
-        return converted_html
-    else:
-        # Fallback: return processed body if we couldn't find sections
-        return processed_body
 
-def ensure_unique_ids(html_content, page_number, element_counter):
-    """
-    Ensure all top-level block elements in HTML content have unique IDs.
-    Elements without IDs will get IDs following the pattern: page_{page_number}_{counter}
-    Elements with existing IDs will be preserved.
-    Only processes block-level elements (p, h1-h6, div, etc.) that appear at the top level.
-    """
-    if not html_content or not html_content.strip():
-        return html_content, element_counter
-    
-    # Elements that should have IDs (block-level elements)
-    # Focus on elements that are typically top-level content elements
-    elements_needing_ids = {'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'div', 'section', 'article', 
-                           'nav', 'header', 'footer', 'aside', 'main', 'ul', 'ol', 'li', 
-                           'dl', 'dt', 'dd', 'blockquote', 'figure', 'figcaption', 'table',
-                           'thead', 'tbody', 'tfoot', 'tr'}
-    
-    # Pattern to match opening tags at the start of the string or after whitespace/newline
-    # This helps identify top-level elements (not nested)
-    # Match: whitespace/newline followed by <tag ...> or <tag .../>
-    tag_pattern = re.compile(
-        r'(?P<prefix>^|\s+)<(?P<tag>\w+)(?P<attrs>(?:\s+[^>]*?)?)(?P<self_closing>/?)>',
-        re.MULTILINE | re.DOTALL
-    )
-    
-    def add_id_to_tag(match):
-        nonlocal element_counter
-        prefix = match.group('prefix')
-        tag = match.group('tag').lower()
-        attrs = match.group('attrs')
-        self_closing = match.group('self_closing')
-        original_tag = match.group('tag')  # Preserve original case
-        
-        # Only process elements that should have IDs
-        if tag not in elements_needing_ids:
-            return match.group(0)
-        
-        # Check if ID already exists
-        id_match = re.search(r'\bid\s*=\s*["\']([^"\']+)["\']', attrs, re.IGNORECASE)
-        if id_match:
-            # ID already exists, keep it
-            return match.group(0)
-        
-        # Add unique ID
-        element_counter += 1
-        unique_id = f'page_{page_number}_{element_counter}'
-        
-        # Insert ID attribute
-        if attrs.strip():
-            # Add ID after existing attributes
-            new_attrs = f'{attrs} id="{unique_id}"'
-        else:
-            # No existing attributes, just add ID with a space
-            new_attrs = f' id="{unique_id}"'
-        
-        return f'{prefix}<{original_tag}{new_attrs}{self_closing}>'
-    
-    # Process all tags in the content
-    result = tag_pattern.sub(add_id_to_tag, html_content)
-    
-    return result, element_counter
+    # Reassemble HTML: single join, no body re-splicing needed
+    return '\n'.join(final_body_lines)
 
 def generate_html_page(page_id, page_data, toc_entry, css_file, page_number=None):
     """Generate HTML file for a page"""
@@ -690,119 +981,87 @@ def generate_html_page(page_id, page_data, toc_entry, css_file, page_number=None
     # Build role attribute string (omit for copyright and content pages)
     role_attr = f' role="{aria_role}"' if aria_role else ''
     
-    # Build HTML content (HTML5 standard) - matching POC_ePUB structure
-    html_parts = [
-        '<?xml version="1.0" encoding="UTF-8"?>',
-        '<!DOCTYPE html>',
-        '<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" lang="en">',
-        '',
-        '<head>',
-        '    <meta charset="utf-8" />',
-        '    <meta name="viewport" content="width=device-width, initial-scale=1.0"/>',
-        f'    <title>{toc_entry.get("title", page_id)}</title>',
-        f'    <link rel="stylesheet" type="text/css" href="../css/{css_file}" />',
+    # Build HTML content (HTML5 standard) - matching POC_ePUB structure.
+    # The boilerplate lives in the module-level _PAGE_HEAD template; only the
+    # per-page fields are substituted here.
+    html_parts = [_PAGE_HEAD % {
+        'title': toc_entry.get('title', page_id),
+        'css': css_file,
         # Project-specific overrides (replaces legacy epub_common.css)
-        *( [f'    <link rel="stylesheet" type="text/css" href="../css/{CUSTOM_CSS_NAME}" />'] if CUSTOM_CSS_FILE.exists() else [] ),
-        '</head>',
-        '',
-        '<body>',
-        '    <main role="main">',
-        f'        <section id="page_{page_number if page_number else page_id}" epub:type="{epub_type}"{role_attr} class="{section_class}">'
-    ]
+        'custom_css': CUSTOM_CSS_LINK_TAG + '\n' if CUSTOM_CSS_EXISTS else '',
+        'anchor': page_number if page_number else page_id,
+        'epub_type': epub_type,
+        'role_attr': role_attr,
+        'section_class': section_class,
+    }]
     
     # Initialize element counter for unique IDs (starts at 0, pagebreak will be 1)
     element_counter = 0
-    
+    is_cover = page_id == 'cvi' or page_id.startswith('cover')
+
     # Add page break marker at the start if page number is provided
     if page_number is not None:
         element_counter += 1
         pagebreak_id = f"pagebreak_{page_number}"
-        page_label = f"Page {page_number}"
-        if page_id == 'cvi' or page_id.startswith('cover'):
-            page_label = "Cover Page"
+        page_label = "Cover Page" if is_cover else f"Page {page_number}"
         html_parts.append(f'            <span epub:type="pagebreak" role="doc-pagebreak" id="{pagebreak_id}"><span class="sr-only">{page_label}</span></span>')
-    
+
     # Special handling for cover page
-    if page_id == 'cvi' or page_id.startswith('cover'):
+    cover_alt_repl = None
+    if is_cover:
         # Add h1 with visually-hidden class
         element_counter += 1
         cover_h1_text = f'Book cover of "{BOOK_TITLE}" by {BOOK_AUTHOR}'
         html_parts.append(f'            <h1 id="page_{page_number if page_number else 1}_{element_counter}" class="visually-hidden">{cover_h1_text}</h1>')
-    
+        # Use &quot; so alt="...\"...\"..." is valid (no unescaped " inside
+        # attribute). Built once here rather than per sentence.
+        cover_alt_repl = f'alt="Book cover of &quot;{BOOK_TITLE}&quot; by {BOOK_AUTHOR}"'
+
     # Add all sentences and ensure unique IDs
     for idx, sentence in enumerate(sentences, start=1):
         sentence_text = sentence.get('sentence_text', '')
         if sentence_text:
-            # Fix image paths
-            sentence_text = fix_image_paths(sentence_text, page_id)
-            # Clean invalid HTML tags (convert z tags to span)
-            sentence_text = clean_html_tags(sentence_text)
-            # Add aria-hidden="true" to <br> and <hr> so they are hidden from screen readers
-            sentence_text = add_aria_hidden_to_br_hr(sentence_text)
-            
+            # Fix image paths, clean invalid <z> tags, hide <br>/<hr> from
+            # screen readers and assign unique element IDs in a single pass
+            sentence_text, element_counter = transform_sentence(
+                sentence_text, page_number, element_counter
+            )
+
             # Special handling for cover page images - update alt text
-            if (page_id == 'cvi' or page_id.startswith('cover')) and '<img' in sentence_text:
-                # Use &quot; so alt="...\"...\"..." is valid (no unescaped " inside attribute)
-                cover_alt_text = f'Book cover of &quot;{BOOK_TITLE}&quot; by {BOOK_AUTHOR}'
+            if is_cover and '<img' in sentence_text:
                 # Update or add alt text to image
                 if 'alt=' in sentence_text:
                     # Replace existing alt text
-                    sentence_text = re.sub(
-                        r'alt=["\']([^"\']*)["\']',
-                        f'alt="{cover_alt_text}"',
-                        sentence_text
-                    )
+                    sentence_text = _RE_IMG_ALT.sub(cover_alt_repl, sentence_text)
                 else:
                     # Add alt text before closing />
-                    sentence_text = re.sub(
-                        r'(<img[^>]*?)(\s*/?>)',
-                        f'\\1 alt="{cover_alt_text}"\\2',
+                    sentence_text = _RE_IMG_TAG_CLOSE.sub(
+                        f'\\1 {cover_alt_repl}\\2',
                         sentence_text
                     )
-            
-            # Ensure all elements have unique IDs
-            if page_number is not None:
-                sentence_text, element_counter = ensure_unique_ids(sentence_text, page_number, element_counter)
+
             html_parts.append(f'            {sentence_text}')
     
+    # Join once; the page-specific transformations below work on the joined
+    # string directly, so there is no join -> split -> re-join churn.
+    html = '\n'.join(html_parts)
+
     # Convert copyright page structure to match POC_ePUB (headings and lists)
     if page_id == 'crt' or page_id.startswith('copyright'):
-        # Join all HTML parts, convert structure, then split back
-        combined_html = '\n'.join(html_parts)
-        combined_html = convert_copyright_structure(combined_html, page_id, page_number)
-        html_parts = combined_html.split('\n')
-    
+        html = convert_copyright_structure(html, page_id, page_number)
+
     # Title page: change h1.author to p.author so the page has only one h1 (the book title)
     if page_id == 'tp' or page_id.startswith('titlepage'):
-        combined_html = '\n'.join(html_parts)
-        # Replace <h1 ... class='author' ...>...</h1> with <p ... class='author' ...>...</p>
-        combined_html = re.sub(
-            r'<h1((?=[^>]*class=["\']author["\'])[^>]*)>(.*?)</h1>',
-            r'<p\1>\2</p>',
-            combined_html,
-            flags=re.DOTALL
-        )
-        html_parts = combined_html.split('\n')
-    
-    html_parts.extend([
-        '        </section>',
-        '    </main>',
-        '</body>',
-        '',
-        '</html>'
-    ])
-    
-    return '\n'.join(html_parts)
+        html = _RE_H1_AUTHOR.sub(r'<p\1>\2</p>', html)
 
-def create_mimetype():
-    """Create mimetype file (must be first, uncompressed)"""
-    mimetype_path = EPUB_DIR / "mimetype"
-    with open(mimetype_path, 'w', encoding='utf-8') as f:
-        f.write('application/epub+zip')
-    return mimetype_path
+    return html + _PAGE_FOOTER
 
-def create_container_xml(metainf_dir):
-    """Create META-INF/container.xml"""
+# Contents of the mimetype entry (must be the first, uncompressed zip entry)
+MIMETYPE_BYTES = b'application/epub+zip'
+
+
+def create_container_xml():
+    """Build META-INF/container.xml in memory; returns (arcname, text)"""
     container_xml = f'''<?xml version="1.0" encoding="UTF-8"?>
 <container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
     <rootfiles>
@@ -810,174 +1069,231 @@ def create_container_xml(metainf_dir):
     </rootfiles>
 </container>'''
     
-    container_path = metainf_dir / "container.xml"
-    with open(container_path, 'w', encoding='utf-8') as f:
-        f.write(container_xml)
-    
-    return container_path
+    return 'META-INF/container.xml', container_xml
+
+# Front-matter file renames applied to TOC hrefs (matches POC_ePUB naming)
+_FRONT_MATTER_MAP = {
+    'cvi.xhtml': 'cover.xhtml',
+    'tp.xhtml': 'titlepage.xhtml',
+    'crt.xhtml': 'copyright.xhtml',
+}
+
+
+@lru_cache(maxsize=None)
+def _xhtml_name(page_id, href):
+    """Resolve a TOC href to its xhtml file name inside the EPUB.
+
+    Strips the book prefix, swaps the .htm extension, maps the content/toc
+    entry to content.xhtml (toc.xhtml is reserved for the navigation
+    document) and applies the front-matter renames. Memoized because every
+    writer resolves the same (page_id, href) pairs; the cache is reset by
+    init_config since the result depends on BOOK_PREFIX.
+    """
+    base = href.replace(BOOK_PREFIX, '').replace('.htm', '.xhtml')
+    if page_id in ('content', 'toc') or base in ('content.xhtml', 'toc.xhtml'):
+        return 'content.xhtml'
+    return _FRONT_MATTER_MAP.get(base, base)
+
+
+# printf-style row templates for fixed-shape manifest/spine/nav/NCX output;
+# %-formatting with a tuple is the cheapest formatting path for these rows
+_M_XHTML = '    <item id="%s" href="xhtml/%s" media-type="application/xhtml+xml"/>\n'
+_M_IMAGE = f'    <item id="img-%s" href="{IMAGES_DIR_NAME}/%s" media-type="%s"/>\n'
+_M_AUDIO = '    <item id="audio-%s" href="audio/%s" media-type="audio/mpeg" />\n'
+_M_FONT = f'    <item id="font-%s" href="{CSS_DIR_NAME}/fonts/%s" media-type="font/ttf"/>\n'
+_S_ITEMREF = '    <itemref idref="%s"/>\n'
+_NCX_NAVPOINT = '''        <navPoint id="navpoint-%s" playOrder="%s">
+            <navLabel>
+                <text>%s</text>
+            </navLabel>
+            <content src="xhtml/%s"/>
+        </navPoint>
+'''
+_NAV_LI = '                    <li id="toc_list_%s"><a href="%s#page_%s">%s</a></li>\n'
+_PAGELIST_LI = '                    <li id="page-list_%s"><a href="%s#pagebreak_%s">%s</a></li>\n'
+_CONTENT_LI = '                        <li id="page_4_3_%s" class=\'toc\'><a class="hlink" href="%s#page_%s">%s</a></li>\n'
+
+def _scan_ext(dir_path, exts):
+    """List the files in dir_path whose name ends with exts (a suffix string
+    or tuple of suffixes, lowercase). Uses os.scandir so no per-entry Path
+    objects or extra stat calls are made; returns DirEntry objects, which
+    are os.PathLike and usable anywhere a path is expected."""
+    with os.scandir(dir_path) as entries:
+        return [e for e in entries if e.is_file() and e.name.lower().endswith(exts)]
+
+
+# Cached (font_dir, font_paths) resolved by resolve_fonts_dir(); reset by
+# init_config because the fallback chain depends on the runtime directories
+_FONT_CACHE = None
+
+
+def resolve_fonts_dir():
+    """Locate the fonts directory and list its .ttf files, once per run.
+
+    Prefers fonts alongside the input content folder, falling back to the
+    legacy ./fonts and media/fonts locations. Both the manifest writer and
+    copy_font_files consume the cached result, so the directory probes and
+    glob happen a single time.
+    """
+    global _FONT_CACHE
+    if _FONT_CACHE is None:
+        font_dir = None
+        if FONTS_SOURCE_DIR and FONTS_SOURCE_DIR.exists():
+            font_dir = FONTS_SOURCE_DIR
+        else:
+            fonts_dir = SOURCE_DIR / FONTS_DIR_NAME
+            fonts_dir_alt = MEDIA_DIR / FONTS_DIR_NAME
+            if fonts_dir.exists():
+                font_dir = fonts_dir
+            elif fonts_dir_alt.exists():
+                font_dir = fonts_dir_alt
+        font_files = _scan_ext(font_dir, '.ttf') if font_dir else []
+        _FONT_CACHE = (font_dir, font_files)
+    return _FONT_CACHE
+
+
+# Image extensions accepted from the media directory
+_IMAGE_EXTS = {'.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp'}
+
+# Extensions whose formats are already compressed: re-deflating them costs
+# CPU for near-zero size savings (and storing keeps MP3 audio byte-range
+# seekable). Everything else - generated text, TTF fonts, SVG art -
+# deflates well and defaults to ZIP_DEFLATED.
+_STORED_EXTS = frozenset({
+    '.jpg', '.jpeg', '.png', '.gif', '.webp',
+    '.mp3',
+    '.woff', '.woff2',
+})
+
+# Image media types by extension, keyed on the lowercased suffix
+_MEDIA_TYPES = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.gif': 'image/gif',
+    '.svg': 'image/svg+xml',
+    '.webp': 'image/webp',
+}
+
 
 def get_image_media_type(img_file):
-    img_path = Path(img_file)
-    ext = img_path.suffix.lower()
-    return {
-        '.jpg': 'image/jpeg',
-        '.jpeg': 'image/jpeg',
-        '.png': 'image/png',
-        '.gif': 'image/gif',
-        '.svg': 'image/svg+xml',
-        '.webp': 'image/webp',
-    }.get(ext, 'image/jpeg')
-
-
-def create_content_opf(data, toc_entries, oebps_dir):
-    """Create OEBPS/package.opf"""
+    ext = os.path.splitext(str(img_file))[1].lower()
+    return _MEDIA_TYPES.get(ext, 'image/jpeg')
+
+
+def create_content_opf(data, toc_entries, sorted_toc, image_assets):
+    """Build OEBPS/package.opf in memory; returns (arcname, text)"""
     
     # Get all pages
     pages = data.get('Pages', {})
     
-    # Build manifest items
-    manifest_items = []
+    # Build manifest items. The manifest is append-only, so it streams into a
+    # single StringIO buffer instead of a list of per-item strings; the spine
+    # stays a list because the content.xhtml fallback below may insert into it.
+    manifest = io.StringIO()
     spine_items = []
     
     # Add CSS (always named styles.css inside the EPUB)
     css_file = EPUB_CSS_NAME
-    manifest_items.append(f'    <item id="css" href="css/{css_file}" media-type="text/css"/>')
+    manifest.write(f'    <item id="css" href="css/{css_file}" media-type="text/css"/>\n')
     
     # Add optional custom.css to manifest if it exists
-    if CUSTOM_CSS_FILE.exists():
-        manifest_items.append(f'    <item id="custom-css" href="css/{CUSTOM_CSS_NAME}" media-type="text/css"/>')
+    if CUSTOM_CSS_EXISTS:
+        manifest.write(f'    <item id="custom-css" href="css/{CUSTOM_CSS_NAME}" media-type="text/css"/>\n')
     
     # Add EPUB 3.3 navigation document (toc.xhtml) - matches POC_ePUB structure
-    manifest_items.append(f'    <item id="toc" href="xhtml/toc.xhtml" media-type="application/xhtml+xml" properties="nav"/>')
+    manifest.write(f'    <item id="toc" href="xhtml/toc.xhtml" media-type="application/xhtml+xml" properties="nav"/>\n')
     
     # Check if content.xhtml will be added from TOC entries (to avoid duplicates)
     has_content_in_toc = 'content' in toc_entries or 'toc' in toc_entries
     
     # Add content.xhtml (visible table of contents page) only if not already in TOC
     if not has_content_in_toc:
-        manifest_items.append(f'    <item id="content" href="xhtml/content.xhtml" media-type="application/xhtml+xml"/>')
+        manifest.write(f'    <item id="content" href="xhtml/content.xhtml" media-type="application/xhtml+xml"/>\n')
     
     # Add NCX file for backward compatibility (required when spine has toc="ncx")
-    manifest_items.append(f'    <item id="ncx" href="toc.ncx" media-type="application/x-dtbncx+xml"/>')
+    manifest.write(f'    <item id="ncx" href="toc.ncx" media-type="application/x-dtbncx+xml"/>\n')
     
     # Add cover image entries using standardised names to match POC EPUB:
     #   - images/cover.jpg  (with properties="cover-image")
     #   - images/cover_thumbnail.jpg
-    cover_media_type = get_image_media_type("cover.jpg")
-    manifest_items.append(
-        f'    <item id="cover-image" href="{IMAGES_DIR_NAME}/cover.jpg" media-type="{cover_media_type}" properties="cover-image"/>'
+    cover_media_type = 'image/jpeg'  # cover is always normalised to cover.jpg
+    manifest.write(
+        f'    <item id="cover-image" href="{IMAGES_DIR_NAME}/cover.jpg" media-type="{cover_media_type}" properties="cover-image"/>\n'
     )
-    manifest_items.append(
-        f'    <item id="thumbnailcover-image" href="{IMAGES_DIR_NAME}/cover_thumbnail.jpg" media-type="{cover_media_type}"/>'
+    manifest.write(
+        f'    <item id="thumbnailcover-image" href="{IMAGES_DIR_NAME}/cover_thumbnail.jpg" media-type="{cover_media_type}"/>\n'
     )
     
     # Add all images from media directory (original source images)
-    if MEDIA_DIR.exists():
-        for img_file in MEDIA_DIR.glob('*.jpg'):
-            # Skip the original cover source file; we reference cover.jpg instead
-            if COVER_SOURCE_NAME and img_file.name == COVER_SOURCE_NAME:
-                continue
-            media_type = get_image_media_type(img_file)
-            manifest_items.append(f'    <item id="img-{img_file.stem}" href="{IMAGES_DIR_NAME}/{img_file.name}" media-type="{media_type}"/>')
+    for img_file, media_type in image_assets:
+        # Skip the original cover source file; we reference cover.jpg instead
+        if COVER_SOURCE_NAME and img_file.name == COVER_SOURCE_NAME:
+            continue
+        manifest.write(_M_IMAGE % (os.path.splitext(img_file.name)[0], img_file.name, media_type))
     
-    # Add audio files if they exist (for glossary with audio support)
-    # Check source directory first, then target directory (in case already copied)
+    # Add audio files if they exist (for glossary with audio support).
+    # Prefer the source directory - the target is a copy of it, and it may
+    # still be filling while this writer runs concurrently with the audio
+    # copy; fall back to the target for trees where only the copy survives.
     audio_source_dir = INPUT_DIR / "audio"
     audio_target_dir = OEBPS_DIR / "audio"
-    audio_dir_to_check = audio_target_dir if audio_target_dir.exists() else audio_source_dir
+    audio_dir_to_check = audio_source_dir if audio_source_dir.exists() else audio_target_dir
     if audio_dir_to_check.exists():
-        for audio_file in audio_dir_to_check.glob('*.mp3'):
-            manifest_items.append(f'    <item id="audio-{audio_file.stem}" href="audio/{audio_file.name}" media-type="audio/mpeg" />')
+        for audio_file in _scan_ext(audio_dir_to_check, '.mp3'):
+            manifest.write(_M_AUDIO % (os.path.splitext(audio_file.name)[0], audio_file.name))
     
-    # Add font files to manifest (look in input fonts directory first, then legacy locations).
-    # Fonts are placed alongside CSS in a css/fonts/ subfolder so that the
-    # original CSS src:url(fonts/...) references remain valid without changes.
-    font_dir_to_use = None
-    if FONTS_SOURCE_DIR and FONTS_SOURCE_DIR.exists():
-        font_dir_to_use = FONTS_SOURCE_DIR
-    else:
-        fonts_dir = SOURCE_DIR / FONTS_DIR_NAME
-        fonts_dir_alt = MEDIA_DIR / FONTS_DIR_NAME
-        if fonts_dir.exists():
-            font_dir_to_use = fonts_dir
-        elif fonts_dir_alt.exists():
-            font_dir_to_use = fonts_dir_alt
-    
-    if font_dir_to_use:
-        for font_file in font_dir_to_use.glob('*.ttf'):
-            font_name = font_file.name
-            manifest_items.append(
-                f'    <item id="font-{font_file.stem}" href="{CSS_DIR_NAME}/fonts/{font_name}" media-type="font/ttf"/>'
-            )
-    
-    # Sort TOC entries by playOrder
-    sorted_toc = sorted(toc_entries.items(), key=lambda x: int(x[1].get('playOrder', 999)))
+    # Add font files to manifest. Fonts are placed alongside CSS in a
+    # css/fonts/ subfolder so that the original CSS src:url(fonts/...)
+    # references remain valid without changes.
+    for font_file in resolve_fonts_dir()[1]:
+        manifest.write(_M_FONT % (os.path.splitext(font_file.name)[0], font_file.name))
     
     # Track if content is in TOC entries
     content_in_spine = False
-    
+    # Position of each idref within spine_items, for O(1) insert lookups
+    spine_idref_pos = {}
+
     # Add HTML files
     for page_id, toc_entry in sorted_toc:
         href = toc_entry.get('href', f'{page_id}.htm')
         # Use the href from TOC but ensure it's in OEBPS
-        html_file = href.replace(BOOK_PREFIX, '').replace('.htm', '.xhtml')
+        html_file = _xhtml_name(page_id, href)
         # Default manifest ID is the page_id
         manifest_id = page_id
         
-        # Map front matter file names to match POC_ePUB: cvi -> cover, tp -> titlepage, crt -> copyright
-        if html_file == 'cvi.xhtml':
-            html_file = 'cover.xhtml'
-        elif html_file == 'tp.xhtml':
-            html_file = 'titlepage.xhtml'
-        elif html_file == 'crt.xhtml':
-            html_file = 'copyright.xhtml'
-        elif page_id == 'content' or page_id == 'toc':
-            # Handle content/toc TOC entry - map to content.xhtml
-            html_file = 'content.xhtml'
+        if page_id == 'content' or page_id == 'toc':
             # Use 'content' as the ID (not 'toc' which is reserved for navigation document)
             manifest_id = 'content'
             if toc_entry.get('linear') == 'yes':
                 content_in_spine = True
         
-        manifest_items.append(f'    <item id="{manifest_id}" href="xhtml/{html_file}" media-type="application/xhtml+xml"/>')
+        manifest.write(_M_XHTML % (manifest_id, html_file))
         if toc_entry.get('linear') == 'yes':
-            spine_items.append(f'    <itemref idref="{manifest_id}"/>')
-    
+            spine_idref_pos[manifest_id] = len(spine_items)
+            spine_items.append(_S_ITEMREF % manifest_id)
+
     # Ensure content.xhtml is in spine if not already added (matches POC_ePUB structure)
-    if not content_in_spine and 'content' not in [item.split('"')[1] for item in spine_items if 'idref=' in item]:
-        # Find position after copyright (crt) to insert content
-        crt_index = None
-        for i, item in enumerate(spine_items):
-            if 'idref="crt"' in item or 'idref=\'crt\'' in item:
-                crt_index = i + 1
+    if not content_in_spine and 'content' not in spine_idref_pos:
+        # Insert after copyright (crt), else titlepage (tp), else cover;
+        # last resort is the beginning of the spine
+        for anchor in ('crt', 'tp', 'cover'):
+            anchor_pos = spine_idref_pos.get(anchor)
+            if anchor_pos is not None:
+                spine_items.insert(anchor_pos + 1, '    <itemref idref="content"/>\n')
                 break
-        if crt_index is not None:
-            spine_items.insert(crt_index, '    <itemref idref="content"/>')
         else:
-            # If crt not found, add after tp (titlepage)
-            tp_index = None
-            for i, item in enumerate(spine_items):
-                if 'idref="tp"' in item or 'idref=\'tp\'' in item:
-                    tp_index = i + 1
-                    break
-            if tp_index is not None:
-                spine_items.insert(tp_index, '    <itemref idref="content"/>')
-            else:
-                # Fallback: add after cover
-                cover_index = None
-                for i, item in enumerate(spine_items):
-                    if 'idref="cover"' in item or 'idref=\'cover\'' in item:
-                        cover_index = i + 1
-                        break
-                if cover_index is not None:
-                    spine_items.insert(cover_index, '    <itemref idref="content"/>')
-                else:
-                    # Last resort: add at beginning
-                    spine_items.insert(0, '    <itemref idref="content"/>')
+            spine_items.insert(0, '    <itemref idref="content"/>\n')
     
-    publication_date = datetime.now().strftime("%Y-%m-%d")
+    # One clock read covers both OPF timestamps; BOOK_BUILD_TIME (an ISO
+    # datetime) overrides the clock for reproducible builds
+    build_time = os.environ.get('BOOK_BUILD_TIME')
+    now = datetime.fromisoformat(build_time) if build_time else datetime.now()
+    publication_date = now.strftime("%Y-%m-%d")
+    modified = now.strftime("%Y-%m-%dT%H:%M:%SZ")
     
-    content_opf = f'''<?xml version="1.0" encoding="UTF-8"?>
+    buf = io.StringIO()
+    buf.write(f'''<?xml version="1.0" encoding="UTF-8"?>
 <package xmlns="http://www.idpf.org/2007/opf" version="3.3" unique-identifier="bookid" xmlns:dc="http://purl.org/dc/elements/1.1/" xml:lang="en">
     <metadata xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:opf="http://www.idpf.org/2007/opf">
         <dc:title>{BOOK_TITLE}</dc:title>
@@ -990,7 +1306,7 @@ def create_content_opf(data, toc_entries, oebps_dir):
         <dc:date>{publication_date}</dc:date>
         <dc:type>Book</dc:type>
         <meta name="cover" content="cover-image"/>
-        <meta property="dcterms:modified">{datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")}</meta>
+        <meta property="dcterms:modified">{modified}</meta>
         <meta property="schema:accessMode">textual</meta>
         <meta property="schema:accessMode">visual</meta>
         <meta property="schema:accessibilityFeature">alternativeText</meta>
@@ -1008,24 +1324,16 @@ def create_content_opf(data, toc_entries, oebps_dir):
         </meta>
     </metadata>
     <manifest>
-{chr(10).join(manifest_items)}
-    </manifest>
+{manifest.getvalue()}    </manifest>
     <spine toc="ncx">
-{chr(10).join(spine_items)}
-    </spine>
-</package>'''
-    
-    opf_path = oebps_dir / "package.opf"
-    with open(opf_path, 'w', encoding='utf-8') as f:
-        f.write(content_opf)
+''')
+    buf.writelines(spine_items)
+    buf.write('    </spine>\n</package>')
     
-    return opf_path
+    return f'{OEBPS_DIR_NAME}/package.opf', buf.getvalue()
 
-def create_toc_ncx(data, toc_entries, oebps_dir):
-    """Create OPS/toc.ncx"""
-    
-    # Sort TOC entries by playOrder
-    sorted_toc = sorted(toc_entries.items(), key=lambda x: int(x[1].get('playOrder', 999)))
+def create_toc_ncx(data, sorted_toc):
+    """Build OPS/toc.ncx in memory; returns (arcname, text)"""
     
     nav_points = []
     nav_counter = 1
@@ -1033,28 +1341,14 @@ def create_toc_ncx(data, toc_entries, oebps_dir):
     for page_id, toc_entry in sorted_toc:
         title = toc_entry.get('title', page_id)
         href = toc_entry.get('href', f'{page_id}.htm')
-        html_file = href.replace(BOOK_PREFIX, '').replace('.htm', '.xhtml')
-        # Map front matter file names
-        if html_file == 'cvi.xhtml':
-            html_file = 'cover.xhtml'
-        elif html_file == 'tp.xhtml':
-            html_file = 'titlepage.xhtml'
-        elif html_file == 'crt.xhtml':
-            html_file = 'copyright.xhtml'
-        elif page_id == 'content' or page_id == 'toc':
-            # Handle content/toc TOC entry - map to content.xhtml (not toc.xhtml)
-            html_file = 'content.xhtml'
+        html_file = _xhtml_name(page_id, href)
         play_order = toc_entry.get('playOrder', nav_counter)
         
-        nav_points.append(f'''        <navPoint id="navpoint-{nav_counter}" playOrder="{play_order}">
-            <navLabel>
-                <text>{title}</text>
-            </navLabel>
-            <content src="xhtml/{html_file}"/>
-        </navPoint>''')
+        nav_points.append(_NCX_NAVPOINT % (nav_counter, play_order, title, html_file))
         nav_counter += 1
     
-    toc_ncx = f'''<?xml version="1.0" encoding="UTF-8"?>
+    buf = io.StringIO()
+    buf.write(f'''<?xml version="1.0" encoding="UTF-8"?>
                     <ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1">
                         <head>
                             <meta name="dtb:uid" content="{BOOK_ID}"/>
@@ -1066,47 +1360,30 @@ def create_toc_ncx(data, toc_entries, oebps_dir):
                             <text>{BOOK_TITLE}</text>
                         </docTitle>
                         <navMap>
-                    {chr(10).join(nav_points)}
-                        </navMap>
-                    </ncx>'''
-
+                    ''')
+    buf.writelines(nav_points)
+    buf.write('                        </navMap>\n                    </ncx>')
     
-    ncx_path = oebps_dir / "toc.ncx"
-    with open(ncx_path, 'w', encoding='utf-8') as f:
-        f.write(toc_ncx)
-    
-    return ncx_path
+    return f'{OEBPS_DIR_NAME}/toc.ncx', buf.getvalue()
 
-def create_nav_xhtml(data, toc_entries, oebps_xhtml_dir, css_file, page_breaks=None):
-    """Create EPUB 3.3 toc.xhtml navigation document - matches POC_ePUB structure
+def create_nav_xhtml(data, sorted_toc, css_file, page_breaks=None):
+    """Build the EPUB 3.3 toc.xhtml navigation document in memory - matches
+    POC_ePUB structure. Returns (arcname, text).
     
     Args:
         page_breaks: List of tuples (page_number, html_filename) for page breaks, e.g. [(1, 'cover.xhtml'), (2, 'titlepage.xhtml')]
     """
     
-    # Sort TOC entries by playOrder
-    sorted_toc = sorted(toc_entries.items(), key=lambda x: int(x[1].get('playOrder', 999)))
-    
     # Build TOC items (all pages) - matching POC_ePUB structure
     nav_items = []
     item_counter = 1
     for page_id, toc_entry in sorted_toc:
         title = toc_entry.get('title', page_id)
         href = toc_entry.get('href', f'{page_id}.htm')
-        html_file = href.replace(BOOK_PREFIX, '').replace('.htm', '.xhtml')
-        # Map front matter file names
-        if html_file == 'cvi.xhtml':
-            html_file = 'cover.xhtml'
-        elif html_file == 'tp.xhtml':
-            html_file = 'titlepage.xhtml'
-        elif html_file == 'crt.xhtml':
-            html_file = 'copyright.xhtml'
-        elif page_id == 'content' or page_id == 'toc' or html_file == 'content.xhtml' or html_file == 'toc.xhtml':
-            # Map content/toc entries to content.xhtml (the visible TOC page)
-            html_file = 'content.xhtml'
+        html_file = _xhtml_name(page_id, href)
         # Get page number from playOrder (used for anchor)
         page_num = toc_entry.get('playOrder', item_counter)
-        nav_items.append(f'                    <li id="toc_list_{item_counter}"><a href="{html_file}#page_{page_num}">{title}</a></li>')
+        nav_items.append(_NAV_LI % (item_counter, html_file, page_num, title))
         item_counter += 1
     
     # Build page list navigation (required for EPUB 3.x)
@@ -1114,28 +1391,14 @@ def create_nav_xhtml(data, toc_entries, oebps_xhtml_dir, css_file, page_breaks=N
     if page_breaks:
         page_list_counter = 1
         for page_num, html_file in sorted(page_breaks, key=lambda x: x[0]):
-            page_list_items.append(f'                    <li id="page-list_{page_list_counter}"><a href="{html_file}#pagebreak_{page_num}">{page_num}</a></li>')
+            page_list_items.append(_PAGELIST_LI % (page_list_counter, html_file, page_num, page_num))
             page_list_counter += 1
     
-    # Build optional custom.css link for toc.xhtml
-    custom_link = ""
-    if CUSTOM_CSS_FILE.exists():
-        custom_link = f'    <link rel="stylesheet" type="text/css" href="../css/{CUSTOM_CSS_NAME}"/>\n'
+    # Optional custom.css link for toc.xhtml
+    custom_link = CUSTOM_CSS_NAV_LINK if CUSTOM_CSS_EXISTS else ""
 
-    # Build page list section if page breaks are available
-    page_list_section = ""
-    if page_list_items:
-        page_list_section = f'''
-        <section id="page_list" class="page-container">
-            <nav id="page-list" epub:type="page-list" role="doc-pagelist" aria-labelledby="page-list_title">
-                <h1 id="page-list_title">Page List</h1>
-                <ol>
-{chr(10).join(page_list_items)}
-                </ol>
-            </nav>
-        </section>'''
-    
-    toc_xhtml = f'''<?xml version="1.0" encoding="UTF-8"?>
+    buf = io.StringIO()
+    buf.write(f'''<?xml version="1.0" encoding="UTF-8"?>
 <!DOCTYPE html>
 <html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" lang="en">
 
@@ -1151,20 +1414,30 @@ def create_nav_xhtml(data, toc_entries, oebps_xhtml_dir, css_file, page_breaks=N
             <nav id="toc" epub:type="toc" role="doc-toc" aria-labelledby="toc_title">
                 <h1 id="toc_title">Table of Contents</h1>
                 <ol id="toc_list">
-{chr(10).join(nav_items)}
-                </ol>
+''')
+    buf.writelines(nav_items)
+    buf.write('''                </ol>
+            </nav>
+        </section>''')
+    # Page list section (required for EPUB 3.x) when page breaks exist
+    if page_list_items:
+        buf.write('''
+        <section id="page_list" class="page-container">
+            <nav id="page-list" epub:type="page-list" role="doc-pagelist" aria-labelledby="page-list_title">
+                <h1 id="page-list_title">Page List</h1>
+                <ol>
+''')
+        buf.writelines(page_list_items)
+        buf.write('''                </ol>
             </nav>
-        </section>{page_list_section}
+        </section>''')
+    buf.write('''
     </main>
 </body>
 
-</html>'''
+</html>''')
     
-    toc_path = oebps_xhtml_dir / "toc.xhtml"
-    with open(toc_path, 'w', encoding='utf-8') as f:
-        f.write(toc_xhtml)
-    
-    return toc_path
+    return f'{OEBPS_DIR_NAME}/xhtml/toc.xhtml', buf.getvalue()
 
 def get_chapter_title_html_for_content(data, page_id):
     """
@@ -1179,68 +1452,70 @@ def get_chapter_title_html_for_content(data, page_id):
     sentences = page_data.get('sentences', [])
     if not sentences:
         return None
-    first = sentences[0].get('sentence_text', '')
+    return _chapter_title_html(sentences[0].get('sentence_text', ''))
+
+
+@lru_cache(maxsize=None)
+def _chapter_title_html(first):
+    """Memoized worker for get_chapter_title_html_for_content.
+
+    Keyed on the raw heading sentence, which uniquely determines the
+    output, so repeat renders of the same chapter heading are free.
+    """
     if not first or 'class=\'chapter\'' not in first and 'class="chapter"' not in first:
         return None
     # Extract inner content of the h1
-    inner_match = re.search(r'<h1[^>]*class=["\']chapter["\'][^>]*>(.*?)</h1>', first, re.DOTALL | re.IGNORECASE)
+    inner_match = _RE_CHAPTER_INNER.search(first)
     if not inner_match:
         return None
     inner = inner_match.group(1)
-    # Remove z tags (same as clean_html_tags but without the TOC link fix)
-    inner = re.sub(r"<z\s+class=['\"]s['\"]>", '', inner)
-    inner = re.sub(r'<z\s+class=["\']w["\']>', '', inner)
-    inner = re.sub(r'</z>', '', inner)
+    # Remove z tags (without the TOC link fix the sentence pass applies)
+    inner = _RE_Z_ALL.sub('', inner)
     # Remove "CHAPTER" and number part: everything up to and including first <br> or <br />
-    inner = re.sub(r'^.*?<br\s*/?\s*>', '', inner, count=1, flags=re.DOTALL | re.IGNORECASE)
+    inner = _RE_CHAPTER_LEAD.sub('', inner, count=1)
     inner = inner.strip()
     if not inner:
         return None
     # Use small1 in content.xhtml (POC uses small1 for TOC links)
-    inner = re.sub(r'\bclass=["\']small["\']', 'class="small1"', inner)
+    inner = _RE_SMALL_CLASS.sub('class="small1"', inner)
     # Ensure <br> in title have aria-hidden (same as elsewhere)
     inner = add_aria_hidden_to_br_hr(inner)
     return inner
 
-def create_content_xhtml(data, toc_entries, oebps_xhtml_dir, css_file):
-    """Create content.xhtml - the visible table of contents page with CONTENTS heading"""
-    
-    # Sort TOC entries by playOrder
-    sorted_toc = sorted(toc_entries.items(), key=lambda x: int(x[1].get('playOrder', 999)))
+def create_content_xhtml(data, sorted_toc, css_file):
+    """Build content.xhtml - the visible table of contents page with CONTENTS
+    heading. Returns (arcname, text)."""
     
+    # Only main content pages (chapters) appear in the visible TOC; filter
+    # once up front so the rendering loop below has no per-entry branch
+    chapter_entries = [
+        kv for kv in sorted_toc
+        if kv[0].startswith('c') and kv[0][1:].isdigit()
+    ]
+
     # Build TOC items (only chapters) - matching POC_ePUB structure with formatted titles
     nav_items = []
     item_counter = 1
-    for page_id, toc_entry in sorted_toc:
-        # Only include main content pages (chapters)
-        if page_id.startswith('c') and page_id[1:].isdigit():
-            title_plain = toc_entry.get('title', page_id)
-            # Prefer formatted title (with span.small1 etc.) from chapter's first heading
-            title_html = get_chapter_title_html_for_content(data, page_id)
-            if title_html:
-                title_display = title_html
-            else:
-                title_display = title_plain
-            href = toc_entry.get('href', f'{page_id}.htm')
-            html_file = href.replace(BOOK_PREFIX, '').replace('.htm', '.xhtml')
-            # Map front matter file names
-            if html_file == 'cvi.xhtml':
-                html_file = 'cover.xhtml'
-            elif html_file == 'tp.xhtml':
-                html_file = 'titlepage.xhtml'
-            elif html_file == 'crt.xhtml':
-                html_file = 'copyright.xhtml'
-            # Get page number from playOrder (used for anchor)
-            page_num = toc_entry.get('playOrder', item_counter)
-            nav_items.append(f'                        <li id="page_4_3_{item_counter}" class=\'toc\'><a class="hlink" href="{html_file}#page_{page_num}">{title_display}</a></li>')
-            item_counter += 1
+    for page_id, toc_entry in chapter_entries:
+        title_plain = toc_entry.get('title', page_id)
+        # Prefer formatted title (with span.small1 etc.) from chapter's first heading
+        title_html = get_chapter_title_html_for_content(data, page_id)
+        if title_html:
+            title_display = title_html
+        else:
+            title_display = title_plain
+        href = toc_entry.get('href', f'{page_id}.htm')
+        html_file = _xhtml_name(page_id, href)
+        # Get page number from playOrder (used for anchor)
+        page_num = toc_entry.get('playOrder', item_counter)
+        nav_items.append(_CONTENT_LI % (item_counter, html_file, page_num, title_display))
+        item_counter += 1
     
-    # Build optional custom.css link for content.xhtml
-    custom_link = ""
-    if CUSTOM_CSS_FILE.exists():
-        custom_link = f'    <link rel="stylesheet" type="text/css" href="../css/{CUSTOM_CSS_NAME}"/>\n'
+    # Optional custom.css link for content.xhtml
+    custom_link = CUSTOM_CSS_NAV_LINK if CUSTOM_CSS_EXISTS else ""
 
-    content_xhtml = f'''<?xml version="1.0" encoding="UTF-8"?>
+    buf = io.StringIO()
+    buf.write(f'''<?xml version="1.0" encoding="UTF-8"?>
 <!DOCTYPE html>
 <html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" lang="en">
 
@@ -1257,74 +1532,68 @@ def create_content_xhtml(data, toc_entries, oebps_xhtml_dir, css_file):
             <nav id="page_4_1" aria-labelledby="page_4_2">
                 <h1 id="page_4_2" class='chapter'>CONTENTS</h1>
                 <ol id="page_4_3" class='toc-list'>
-{chr(10).join(nav_items)}
-                </ol>
+''')
+    buf.writelines(nav_items)
+    buf.write('''                </ol>
             </nav>
         </section>
     </main>
 </body>
 
-</html>'''
-    
-    content_path = oebps_xhtml_dir / "content.xhtml"
-    with open(content_path, 'w', encoding='utf-8') as f:
-        f.write(content_xhtml)
+</html>''')
     
-    return content_path
+    return f'{OEBPS_DIR_NAME}/xhtml/content.xhtml', buf.getvalue()
 
 def copy_font_files(oebps_fonts_dir):
     """Copy font files to EPUB structure"""
     print("Copying font files...")
 
-    # Prefer fonts alongside the input content folder, fall back to legacy locations
-    font_dir_to_use = None
-    if FONTS_SOURCE_DIR and FONTS_SOURCE_DIR.exists():
-        font_dir_to_use = FONTS_SOURCE_DIR
-    else:
-        fonts_dir = SOURCE_DIR / FONTS_DIR_NAME
-        fonts_dir_alt = MEDIA_DIR / FONTS_DIR_NAME
-        if fonts_dir.exists():
-            font_dir_to_use = fonts_dir
-        elif fonts_dir_alt.exists():
-            font_dir_to_use = fonts_dir_alt
-    
+    font_dir_to_use, font_files = resolve_fonts_dir()
     if font_dir_to_use:
-        font_files = list(font_dir_to_use.glob('*.ttf'))
         if font_files:
             # Place fonts under css/fonts so that src:url(fonts/...) works
             css_fonts_dir = OEBPS_CSS_DIR / "fonts"
             css_fonts_dir.mkdir(parents=True, exist_ok=True)
-            for font_file in font_files:
-                shutil.copy2(font_file, css_fonts_dir / font_file.name)
-                print(f"  Copied {font_file.name} to css/fonts")
+            copy_pairs = [(f, css_fonts_dir / f.name) for f in font_files]
+            # One summary line instead of a print per font: each print
+            # takes the interpreter's IO lock and flushes, which adds up
+            # across the copy loops
+            copied = sum(_run_copies(copy_pairs))
+            print(f"  Fonts: {copied} copied, {len(copy_pairs) - copied} reused (css/fonts)")
+            return [(f'{OEBPS_DIR_NAME}/{CSS_DIR_NAME}/fonts/{target.name}', target)
+                    for _src, target in copy_pairs]
         else:
             print("  No .ttf font files found in fonts/ directory")
     else:
         print("  No fonts/ directory found (checked: ./fonts and ./media/fonts)")
+    return []
 
-def copy_media_files(oebps_media_dir, data):
-    """Copy media files to EPUB structure and ensure cover assets exist."""
+def copy_media_files(oebps_media_dir, data, image_assets):
+    """Copy media files to EPUB structure and ensure cover assets exist.
+
+    image_assets is the (path, media_type) list scanned once in main and
+    shared with the manifest writer. Returns (arcname, path) entries for
+    the images the archive should carry, so create_epub_zip can stream
+    them without walking the tree.
+    """
     print("Copying media files...")
     copied_files = []
     cover_source_input = None
-    if MEDIA_DIR.exists():
-        for file in MEDIA_DIR.iterdir():
-            if file.is_file():
-                # Only copy actual image assets, not CSS or other aux files
-                suffix = file.suffix.lower()
-                if suffix not in ('.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp'):
-                    continue
-
-                # If this is the original cover source file, keep note of it
-                # but don't copy it directly; we'll normalise to cover.jpg.
-                if COVER_SOURCE_NAME and file.name == COVER_SOURCE_NAME:
-                    cover_source_input = file
-                    continue
+    copy_pairs = []
+    for file, _media_type in image_assets:
+        # If this is the original cover source file, keep note of it
+        # but don't copy it directly; we'll normalise to cover.jpg.
+        if COVER_SOURCE_NAME and file.name == COVER_SOURCE_NAME:
+            cover_source_input = file
+            continue
+        copy_pairs.append((file, oebps_media_dir / file.name))
 
-                target_path = oebps_media_dir / file.name
-                shutil.copy2(file, target_path)
-                copied_files.append(target_path.name)
-                print(f"  Copied {file.name}")
+    # The copies are independent and I/O-bound, so overlap them across a
+    # small thread pool; cover normalisation below runs only after the
+    # pool has joined. Report one summary line rather than one per file.
+    copied = sum(_run_copies(copy_pairs))
+    copied_files = [target_path.name for _file, target_path in copy_pairs]
+    print(f"  Media: {copied} copied, {len(copy_pairs) - copied} reused")
 
     # Determine a suitable source image for cover.jpg / cover_thumbnail.jpg
     cover_source_path = None
@@ -1338,45 +1607,68 @@ def copy_media_files(oebps_media_dir, data):
         if candidate.exists():
             cover_source_path = candidate
 
-    # 2) Fallback: look for any file in images directory that looks like a cover
+    # 2) Fallback: score the copied images in one pass instead of separate
+    #    sorted scans per tier: cover-named beats tp.jpg beats any JPEG;
+    #    ties within a tier resolve alphabetically like the old sorted scans
     if cover_source_path is None:
-        for name in sorted(copied_files):
+        best = None
+        for name in copied_files:
             lower = name.lower()
             if 'cvr' in lower or 'cover' in lower:
-                candidate = oebps_media_dir / name
-                if candidate.exists():
-                    cover_source_path = candidate
-                    break
-
-    # 3) Fallback: specific files such as tp.jpg or first JPEG
-    if cover_source_path is None:
-        for name in sorted(copied_files):
-            if name.lower() == 'tp.jpg':
-                cover_source_path = oebps_media_dir / name
-                break
-    if cover_source_path is None:
-        for name in sorted(copied_files):
-            if name.lower().endswith('.jpg'):
-                cover_source_path = oebps_media_dir / name
-                break
-
-    # 4) Create standardised cover.jpg and cover_thumbnail.jpg if possible
+                score = 0
+            elif lower == 'tp.jpg':
+                score = 1
+            elif lower.endswith('.jpg'):
+                score = 2
+            else:
+                continue
+            if best is None or (score, name) < best:
+                best = (score, name)
+        if best is not None:
+            candidate = oebps_media_dir / best[1]
+            if candidate.exists():
+                cover_source_path = candidate
+
+    # 4) Create standardised cover.jpg and cover_thumbnail.jpg if possible.
+    # Refresh rather than existence-check: the tree is reused across runs,
+    # so a changed input cover must replace the previous pair too.
     if cover_source_path is not None:
         cover_jpg_path = oebps_media_dir / "cover.jpg"
-        if not cover_jpg_path.exists():
-            shutil.copy2(cover_source_path, cover_jpg_path)
+        if copy_if_changed(cover_source_path, cover_jpg_path):
             print(f"  Created cover.jpg from {cover_source_path.name}")
 
+        # The thumbnail is byte-identical to cover.jpg; copy_if_changed
+        # recreates it (fast_copy hardlinks where possible) whenever
+        # cover.jpg itself was refreshed
         cover_thumb_path = oebps_media_dir / "cover_thumbnail.jpg"
-        if not cover_thumb_path.exists():
-            shutil.copy2(cover_source_path, cover_thumb_path)
+        if copy_if_changed(cover_jpg_path, cover_thumb_path):
             print(f"  Created cover_thumbnail.jpg from {cover_source_path.name}")
     else:
         print("  Warning: Could not determine a cover image source; cover.jpg and cover_thumbnail.jpg were not created.")
 
+    # Every image the archive needs: the regular copies plus the
+    # normalised cover pair (listed from the tree since cover.jpg usually
+    # has no counterpart in the input media directory). Keyed on arcname so
+    # an input file literally named cover.jpg cannot yield a duplicate zip
+    # entry (an EPUBCheck error); the normalised cover wins.
+    arc_prefix = f'{OEBPS_DIR_NAME}/{IMAGES_DIR_NAME}/'
+    file_entries = {arc_prefix + target.name: target
+                    for _src, target in copy_pairs}
+    for cover_name in ('cover.jpg', 'cover_thumbnail.jpg'):
+        cover_path = oebps_media_dir / cover_name
+        if cover_path.exists():
+            file_entries[arc_prefix + cover_name] = cover_path
+    return list(file_entries.items())
+
 def copy_css_file(data, oebps_css_dir):
-    """Copy CSS files to EPUB structure"""
+    """Copy CSS files to EPUB structure.
+
+    The stylesheet bytes are read exactly once: the same buffer feeds the
+    on-disk copy and is returned as (arcname, bytes) entries so the ZIP
+    step can write it straight from memory instead of re-reading the tree.
+    """
     print("Copying CSS files...")
+    css_entries = []
 
     # 1️⃣ Copy main source CSS file into EPUB as styles.css
     # Use Styles array directly - it should always exist in the JSON
@@ -1391,59 +1683,104 @@ def copy_css_file(data, oebps_css_dir):
     css_target = oebps_css_dir / EPUB_CSS_NAME
 
     if css_source.exists():
-        shutil.copy2(css_source, css_target)
-        print(f"  Copied {main_css} -> {EPUB_CSS_NAME}")
-
-        # Prepend a reference comment so we can trace the origin of styles.css
+        # Prepend the reference comment (so we can trace the origin of
+        # styles.css) to the source bytes, read once for both destinations.
         try:
-            with open(css_target, "r", encoding="utf-8") as f:
-                original_css = f.read()
-            with open(css_target, "w", encoding="utf-8") as f:
-                header_comment = f"/* Source CSS: {main_css} | Book ID: {BOOK_ID} */\n"
-                f.write(header_comment + original_css)
+            header = f"/* Source CSS: {main_css} | Book ID: {BOOK_ID} */\n".encode('utf-8')
+            css_bytes = header + css_source.read_bytes()
+            with open(css_target, 'wb') as dst:
+                dst.write(css_bytes)
+            css_entries.append((f'{OEBPS_DIR_NAME}/{CSS_DIR_NAME}/{EPUB_CSS_NAME}', css_bytes))
+            print(f"  Copied {main_css} -> {EPUB_CSS_NAME}")
         except OSError as e:
-            print(f"  Warning: Unable to annotate {EPUB_CSS_NAME} with source comment: {e}")
+            print(f"  Warning: Unable to write {EPUB_CSS_NAME}: {e}")
     else:
         print(f"  Warning: CSS file {main_css} not found in media/")
 
     # 2️⃣ Copy optional custom CSS (custom.css) for project-specific overrides
-    if CUSTOM_CSS_FILE.exists():
-        shutil.copy2(CUSTOM_CSS_FILE, oebps_css_dir / CUSTOM_CSS_FILE.name)
+    if CUSTOM_CSS_EXISTS:
+        custom_bytes = CUSTOM_CSS_FILE.read_bytes()
+        with open(oebps_css_dir / CUSTOM_CSS_FILE.name, 'wb') as dst:
+            dst.write(custom_bytes)
+        css_entries.append((f'{OEBPS_DIR_NAME}/{CSS_DIR_NAME}/{CUSTOM_CSS_FILE.name}', custom_bytes))
         print(f"  Copied {CUSTOM_CSS_FILE.name}")
 
-        
+    return css_entries
+
+
+def create_epub_zip(memory_entries, file_entries):
+    """Create the EPUB file (ZIP archive) in a single pass.
 
-def create_epub_zip():
-    """Create the EPUB file (ZIP archive)"""
+    memory_entries is a list of (arcname, text-or-bytes) tuples for the
+    generated documents, written straight from memory; file_entries is a
+    list of (arcname, path) tuples reported by the copy helpers for the
+    media/font/audio assets, read directly from their files. Nothing is
+    re-discovered by walking the EPUB_DIR tree, so stale files left there
+    can never leak into the archive.
+    """
     print("Creating EPUB ZIP file...")
-    
+
     # Place the final EPUB next to the generated EPUB folder (under the output root)
     epub_path = EPUB_DIR.parent / EPUB_NAME
-    
+
     # Remove existing EPUB if it exists
     if epub_path.exists():
         epub_path.unlink()
-    
-    with zipfile.ZipFile(epub_path, 'w', zipfile.ZIP_DEFLATED) as epub_zip:
-        # Add mimetype first (must be uncompressed)
-        mimetype_path = EPUB_DIR / "mimetype"
-        epub_zip.write(mimetype_path, "mimetype", compress_type=zipfile.ZIP_STORED)
-        
-        # Add all other files
-        for root, dirs, files in os.walk(EPUB_DIR):
-            # Skip mimetype as it's already added
-            if 'mimetype' in files:
-                files.remove('mimetype')
-            
-            for file in files:
-                file_path = Path(root) / file
-                # Get relative path from EPUB_DIR
-                arcname = file_path.relative_to(EPUB_DIR)
-                epub_zip.write(file_path, arcname)
+
+    # allowZip64 lets zipfile upgrade to ZIP64 records only if the archive
+    # actually crosses 4 GiB; entries below that stay in the classic format.
+    with zipfile.ZipFile(epub_path, 'w', zipfile.ZIP_DEFLATED,
+                         allowZip64=True,
+                         compresslevel=_COMPRESS_LEVEL) as epub_zip:
+        # Add mimetype first (must be stored uncompressed, with no extra
+        # fields, so readers can sniff it at a fixed offset)
+        mimetype_info = zipfile.ZipInfo('mimetype')
+        mimetype_info.compress_type = zipfile.ZIP_STORED
+        mimetype_info.extra = b''
+        epub_zip.writestr(mimetype_info, MIMETYPE_BYTES)
+
+        # Asset files next: only genuinely pre-compressed formats (per
+        # _STORED_EXTS) are stored as-is; everything else deflates.
+        for arcname, file_path in file_entries:
+            ext = os.path.splitext(arcname)[1].lower()
+            compress_type = (zipfile.ZIP_STORED if ext in _STORED_EXTS
+                             else zipfile.ZIP_DEFLATED)
+            # Small files are read in one go and handed to writestr:
+            # CRC32 and deflate then each run as a single C call over
+            # the buffer instead of a chunked read loop (which matters
+            # for the stored MP3s). Anything at or above
+            # _ZIP_STREAM_THRESHOLD is streamed in 1 MiB chunks instead
+            # so a multi-hundred-MB asset never sits in memory whole.
+            entry_info = zipfile.ZipInfo.from_file(file_path, arcname)
+            entry_info.compress_type = compress_type
+            if entry_info.file_size >= _ZIP_STREAM_THRESHOLD:
+                with epub_zip.open(entry_info, 'w') as dst, \
+                        open(file_path, 'rb') as src:
+                    shutil.copyfileobj(src, dst, length=1024 * 1024)
+            else:
+                with open(file_path, 'rb') as src:
+                    epub_zip.writestr(entry_info, src.read())
+
+        # Generated documents come straight from memory
+        for arcname, text in memory_entries:
+            epub_zip.writestr(arcname, text, compress_type=zipfile.ZIP_DEFLATED)
     
     print(f"EPUB created: {epub_path}")
     return epub_path
 
+def _render_page(task):
+    """Render one page and return (html_filename, html_content).
+
+    Top-level so it can be dispatched to ProcessPoolExecutor workers; the
+    module globals configured by init_config survive the fork start method.
+    The content is returned instead of written - pages go into the EPUB zip
+    straight from memory.
+    """
+    page_id, page_data, toc_entry, css_file, page_number, html_filename = task
+    html_content = generate_html_page(page_id, page_data, toc_entry, css_file, page_number)
+    return html_filename, html_content
+
+
 def main():
     """Main function"""
     print("=" * 60)
@@ -1453,6 +1790,14 @@ def main():
     # Parse command-line arguments
     args = parse_args()
 
+    # Copy-loop thread count (1 disables the pools, e.g. for spinning disks)
+    global _COPY_WORKERS, _COMPRESS_LEVEL
+    _COPY_WORKERS = max(1, args.copy_workers)
+
+    # Deflate level for the packaging pass (1 trades a few % of size for
+    # noticeably faster zipping on large books)
+    _COMPRESS_LEVEL = args.compresslevel
+
     # Resolve input directory (parallel to this script by default)
     input_dir_path = Path(args.input_dir)
     if not input_dir_path.is_absolute():
@@ -1501,7 +1846,7 @@ def main():
     init_config(input_dir_path, book_title, book_id, book_author, output_root)
 
     # Create EPUB structure
-    oebps_dir, metainf_dir, oebps_media_dir, oebps_fonts_dir, oebps_xhtml_dir, oebps_css_dir = create_epub_structure()
+    oebps_dir, oebps_media_dir, oebps_fonts_dir, oebps_xhtml_dir, oebps_css_dir = create_epub_structure()
 
     # Get TOC entries
     toc_entries = data.get('Toc', {})
@@ -1512,69 +1857,196 @@ def main():
     # Inside the EPUB, the main stylesheet is always named EPUB_CSS_NAME (e.g. styles.css)
     css_file = EPUB_CSS_NAME
     
-    # Sort TOC entries by playOrder to assign page numbers
+    # Sort TOC entries by playOrder once; the same sorted list drives page
+    # numbering here and all four metadata writers below
     sorted_toc = sorted(toc_entries.items(), key=lambda x: int(x[1].get('playOrder', 999)))
     page_number = 1
     page_breaks = []  # Track page breaks for page list navigation
     
+    # First pass: build the task list so page numbers and page breaks are
+    # assigned deterministically before any rendering happens.
+    render_tasks = []
     for page_id, toc_entry in sorted_toc:
         if page_id in pages:
             page_data = pages[page_id]
             # Only assign page numbers to linear pages
             current_page_num = page_number if toc_entry.get('linear') == 'yes' else None
-            html_content = generate_html_page(page_id, page_data, toc_entry, css_file, current_page_num)
-            
-            # Get filename from TOC href
+
+            # Get filename from TOC href; _xhtml_name applies the
+            # front-matter renames (_FRONT_MATTER_MAP dict lookup) and the
+            # content/toc -> content.xhtml mapping in one place. Its
+            # lru_cache doubles as the shared (page_id, href) -> filename
+            # table: this loop warms it, so the four writers below resolve
+            # every entry with a plain dict hit.
             href = toc_entry.get('href', f'{page_id}.htm')
-            html_filename = href.replace(BOOK_PREFIX, '').replace('.htm', '.xhtml')
-            # Map front matter file names to match POC_ePUB: cvi -> cover, tp -> titlepage, crt -> copyright
-            if html_filename == 'cvi.xhtml':
-                html_filename = 'cover.xhtml'
-            elif html_filename == 'tp.xhtml':
-                html_filename = 'titlepage.xhtml'
-            elif html_filename == 'crt.xhtml':
-                html_filename = 'copyright.xhtml'
-            elif page_id == 'content' or page_id == 'toc' or html_filename == 'content.xhtml' or html_filename == 'toc.xhtml':
-                # Map content/toc entries to content.xhtml (the visible TOC page)
-                html_filename = 'content.xhtml'
-            html_path = oebps_xhtml_dir / html_filename
-            
-            with open(html_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-            
-            print(f"  Generated {html_filename}")
-            
+            html_filename = _xhtml_name(page_id, href)
+
+            render_tasks.append(
+                (page_id, page_data, toc_entry, css_file, current_page_num,
+                 html_filename)
+            )
+
             # Track page breaks for page list navigation
             if current_page_num is not None:
                 page_breaks.append((current_page_num, html_filename))
                 page_number += 1
-    
+
+    # Second pass: render. Page generation is independent, CPU-bound regex
+    # work, so it is spread across cores where the fork start method is
+    # available (forked workers inherit the module globals set by
+    # init_config); otherwise fall back to the sequential loop. Pages stay
+    # in memory and are zipped from there; --debug-tree additionally writes
+    # them into the EPUB folder tree for inspection.
+    if len(render_tasks) > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        fork_ctx = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(mp_context=fork_ctx) as executor:
+            rendered_pages = list(executor.map(_render_page, render_tasks))
+    elif len(render_tasks) > 1:
+        # No fork (e.g. Windows): threads share the configured module
+        # globals, so they are the portable parallel path
+        with ThreadPoolExecutor(max_workers=min(32, len(render_tasks))) as executor:
+            rendered_pages = list(executor.map(_render_page, render_tasks))
+    else:
+        rendered_pages = [_render_page(task) for task in render_tasks]
+
+    page_entries = []
+    debug_writes = []
+    # Hoist the joins out of the loop: plain string concatenation beats a
+    # fresh f-string/Path.__truediv__ per page
+    arc_prefix = f'{OEBPS_DIR_NAME}/{XHTML_DIR_NAME}/'
+    xhtml_dir_str = str(oebps_xhtml_dir) + os.sep
+    for html_filename, html_content in rendered_pages:
+        page_entries.append((arc_prefix + html_filename, html_content))
+        if args.debug_tree:
+            debug_writes.append((xhtml_dir_str + html_filename, html_content))
+    # One summary line; a print per page serialises the loop on the IO lock
+    print(f"  Generated {len(rendered_pages)} XHTML pages")
+
+    # Drop stale generated pages from earlier runs so removed TOC entries
+    # don't linger in the tree; pages with current names are either skipped
+    # (they never reach the zip, which takes pages from memory) or
+    # refreshed by the digest check below.
+    current_names = {html_filename for html_filename, _ in rendered_pages}
+    for stale_page in oebps_xhtml_dir.glob('*.xhtml'):
+        if stale_page.name not in current_names:
+            stale_page.unlink()
+
+    if debug_writes:
+        # Incremental regeneration: compare each page's blake2b digest to
+        # the sidecar from the previous run and only rewrite pages whose
+        # bytes actually changed.
+        cache_path = oebps_xhtml_dir / BUILD_CACHE_NAME
+        try:
+            with open(cache_path, encoding='utf-8') as f:
+                old_digests = json.load(f)
+        except (OSError, ValueError):
+            old_digests = {}
+        new_digests = {}
+        pending_writes = []
+        for html_path, content in debug_writes:
+            name = os.path.basename(html_path)
+            digest = hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+            new_digests[name] = digest
+            if old_digests.get(name) != digest or not os.path.exists(html_path):
+                pending_writes.append((html_path, content))
+        print(f"  Debug tree: {len(pending_writes)} written, "
+              f"{len(debug_writes) - len(pending_writes)} unchanged")
+
+        # Submit the debug-tree page writes as one batch and drain them
+        # together instead of serialising open/write/close per page
+        def _write_page(item):
+            # Encode once and write the bytes through a raw fd; this skips
+            # the TextIOWrapper/codecs layering of text-mode open, which is
+            # pure overhead for a single whole-page write.
+            html_path, content = item
+            fd = os.open(html_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                os.write(fd, content.encode('utf-8'))
+            finally:
+                os.close(fd)
+
+        if pending_writes:
+            with ThreadPoolExecutor(max_workers=min(8, len(pending_writes))) as executor:
+                list(executor.map(_write_page, pending_writes))
+
+        # Refresh the sidecar; losing it only costs the next run a rewrite
+        try:
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                json.dump(new_digests, f)
+        except OSError:
+            pass
+
+    # Scan the media directory once; the manifest writer and
+    # copy_media_files both consume this list. (The manifest previously
+    # globbed only *.jpg and silently omitted other image types that
+    # copy_media_files shipped into the EPUB.)
+    image_assets = []
+    if MEDIA_DIR.exists():
+        image_assets = [
+            (media_file, get_image_media_type(media_file.name))
+            for media_file in _scan_ext(MEDIA_DIR, tuple(_IMAGE_EXTS))
+        ]
+
     # Create EPUB metadata files
     print("Creating EPUB metadata files...")
-    create_mimetype()
-    create_container_xml(metainf_dir)
-    create_content_opf(data, toc_entries, oebps_dir)
-    create_toc_ncx(data, toc_entries, oebps_dir)
-    create_nav_xhtml(data, toc_entries, oebps_xhtml_dir, css_file, page_breaks)
-    create_content_xhtml(data, toc_entries, oebps_xhtml_dir, css_file)
-    
-    # Copy audio files if they exist (for glossary with audio support)
-    audio_source_dir = INPUT_DIR / "audio"
-    if audio_source_dir.exists():
+
+    def _copy_audio():
+        # Copy audio files if they exist (for glossary with audio support);
+        # returns the (arcname, path) entries the archive should carry
+        audio_source_dir = INPUT_DIR / "audio"
         audio_target_dir = OEBPS_DIR / "audio"
+        if not audio_source_dir.exists():
+            # Mirror the manifest writer's fallback: when only the copied
+            # tree survives, ship its files so every manifest audio item
+            # still has a resource in the archive
+            if audio_target_dir.exists():
+                return [(f'{OEBPS_DIR_NAME}/audio/{audio_file.name}', audio_file)
+                        for audio_file in _scan_ext(audio_target_dir, '.mp3')]
+            return []
         audio_target_dir.mkdir(parents=True, exist_ok=True)
         print("Copying audio files...")
-        for audio_file in audio_source_dir.glob('*.mp3'):
-            shutil.copy2(audio_file, audio_target_dir / audio_file.name)
-            print(f"  Copied {audio_file.name} to audio/")
-    
-    # Copy media, fonts, and CSS
-    copy_media_files(oebps_media_dir, data)
-    copy_font_files(oebps_fonts_dir)
-    copy_css_file(data, oebps_css_dir)
-    
+        audio_target_str = str(audio_target_dir) + os.sep
+        audio_pairs = [(audio_file, audio_target_str + audio_file.name)
+                       for audio_file in _scan_ext(audio_source_dir, '.mp3')]
+        copied = sum(_run_copies(audio_pairs))
+        print(f"  Audio: {copied} copied, {len(audio_pairs) - copied} reused")
+        return [(f'{OEBPS_DIR_NAME}/audio/{audio_file.name}', audio_file)
+                for audio_file, _target in audio_pairs]
+
+    # The metadata writers are pure producers over data already in memory
+    # and the copy_* helpers touch disjoint directories, so the two groups
+    # overlap: the writers' CPU work hides the copy I/O latency.
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        writer_futures = [
+            pool.submit(create_container_xml),
+            pool.submit(create_content_opf, data, toc_entries, sorted_toc, image_assets),
+            pool.submit(create_toc_ncx, data, sorted_toc),
+            pool.submit(create_nav_xhtml, data, sorted_toc, css_file, page_breaks),
+            pool.submit(create_content_xhtml, data, sorted_toc, css_file),
+        ]
+        audio_future = pool.submit(_copy_audio)
+        media_future = pool.submit(copy_media_files, oebps_media_dir, data, image_assets)
+        font_future = pool.submit(copy_font_files, oebps_fonts_dir)
+        css_future = pool.submit(copy_css_file, data, oebps_css_dir)
+
+        # Later entries win on arcname collisions: the generated
+        # content.xhtml replaces a rendered content/toc page, matching the
+        # old on-disk behaviour where the writer overwrote the rendered
+        # file. Results are collected in submit order, so the zip entry
+        # order stays deterministic.
+        merged_entries = dict(page_entries)
+        merged_entries.update(future.result() for future in writer_futures)
+        memory_entries = list(merged_entries.items())
+        memory_entries.extend(css_future.result())
+
+        # The copy helpers report every asset the archive needs, so the
+        # zip step reads sources directly instead of walking the tree
+        file_entries = []
+        for future in (audio_future, media_future, font_future):
+            file_entries.extend(future.result())
+
     # Create EPUB ZIP
-    epub_path = create_epub_zip()
+    epub_path = create_epub_zip(memory_entries, file_entries)
     
     print("=" * 60)
     print(f"SUCCESS! EPUB created at: {epub_path}")